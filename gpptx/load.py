@@ -1,44 +1,275 @@
+import pickle
+from concurrent.futures import Executor
 from io import BytesIO
-from typing import Union, BinaryIO, Dict, Any
+from typing import Union, BinaryIO, Dict, Any, Optional, Iterator, Callable
 
+from gpptx.storage.cache.cache_file import dump_cache_file
 from gpptx.storage.cache.cacher import Cacher, CacheKey
+from gpptx.storage.cache.part_stamps import stamp_persisting_cache, drop_stale_persisting_cache, \
+    map_untracked_persisting_cache
+from gpptx.storage.cache.store import CacheStore
+from gpptx.storage.pptx.compression import CompressionPolicy
 from gpptx.storage.pptx.loader import Loader
+from gpptx.storage.pptx.xml_parser import XmlParserOptions
 from gpptx.storage.storage import PresentationStorage
 from gpptx.types.presentation import Presentation
+from gpptx.util.aio import run_in_executor
+
+_SNAPSHOT_HEADER = b'GPPTX-SNAPSHOT-1\n'
 
 
 class PresentationContainer:
-    def __init__(self, file: Union[BinaryIO, BytesIO] = None, cache: Dict[str, Any] = None, do_log_stats: bool = False):
-        loader = Loader()
+    def __init__(self, file: Union[BinaryIO, BytesIO] = None, cache: Dict[str, Any] = None, do_log_stats: bool = False,
+                 xml_parser_options: XmlParserOptions = None, xml_cache_budget: Optional[int] = None,
+                 cache_store: CacheStore = None, local_handles_budget: Optional[int] = None):
+        """
+        :param cache_store: when it's set and cache is not, the cache of the file is loaded from the store,
+            and the cache is put to the store after every save
+        :param local_handles_budget: max number of xml element handles and other objects kept in local cache,
+            least recently used ones are dropped and made again on demand
+        """
+
+        loader = Loader(xml_parser_options, xml_cache_budget=xml_cache_budget)
         if file is not None:
             loader.load(file)
 
-        cacher = Cacher()
+        self._storage = PresentationStorage(loader, Cacher(local_handles_budget), do_log_stats=do_log_stats)
+        self._root_cache_key = CacheKey('')
+        self._cache_store = cache_store
+
         if cache is not None:
-            cacher.load_persisting_cache(cache)
+            self._storage.load_persisting_cache(cache)
+        elif file is not None:
+            self._load_cache_from_store()
 
-        self._storage = PresentationStorage(loader, cacher, do_log_stats=do_log_stats)
-        self._root_cache_key = CacheKey('')
+    @classmethod
+    def from_path(cls, path: str, cache: Dict[str, Any] = None, do_log_stats: bool = False,
+                  xml_parser_options: XmlParserOptions = None, xml_cache_budget: Optional[int] = None,
+                  cache_store: CacheStore = None, local_handles_budget: Optional[int] = None):
+        container = cls(do_log_stats=do_log_stats,
+                        xml_parser_options=xml_parser_options, xml_cache_budget=xml_cache_budget,
+                        cache_store=cache_store, local_handles_budget=local_handles_budget)
+        container._storage.loader.load_path(path)
+        if cache is not None:
+            container._storage.load_persisting_cache(cache)
+        else:
+            container._load_cache_from_store()
+        return container
+
+    @classmethod
+    async def aopen(cls, file: Union[str, BinaryIO, BytesIO], cache: Dict[str, Any] = None, do_log_stats: bool = False,
+                    xml_parser_options: XmlParserOptions = None, xml_cache_budget: Optional[int] = None,
+                    executor: Executor = None, cache_store: CacheStore = None,
+                    local_handles_budget: Optional[int] = None):
+        """
+        :param file: path or file object
+        """
+
+        if isinstance(file, str):
+            return await run_in_executor(executor, cls.from_path, file, cache=cache, do_log_stats=do_log_stats,
+                                         xml_parser_options=xml_parser_options, xml_cache_budget=xml_cache_budget,
+                                         cache_store=cache_store, local_handles_budget=local_handles_budget)
+        return await run_in_executor(executor, cls, file, cache=cache, do_log_stats=do_log_stats,
+                                     xml_parser_options=xml_parser_options, xml_cache_budget=xml_cache_budget,
+                                     cache_store=cache_store, local_handles_budget=local_handles_budget)
+
+    def save(self, dest: Union[BinaryIO, BytesIO], do_copy_unchanged_raw: bool = True,
+             workers: Optional[int] = None, compression_policy: CompressionPolicy = None) -> None:
+        fingerprint = self._storage.loader.save(dest, do_copy_unchanged_raw=do_copy_unchanged_raw,
+                                                workers=workers, compression_policy=compression_policy)
+        self._put_cache_to_store(fingerprint)
+
+    def iter_save(self, chunk_size: int = 64 * 1024, do_copy_unchanged_raw: bool = True,
+                  workers: Optional[int] = None, compression_policy: CompressionPolicy = None) -> Iterator[bytes]:
+        fingerprint = yield from self._storage.loader.iter_save(
+            chunk_size=chunk_size, do_copy_unchanged_raw=do_copy_unchanged_raw,
+            workers=workers, compression_policy=compression_policy)
+        self._put_cache_to_store(fingerprint)
+
+    async def asave(self, dest: Union[BinaryIO, BytesIO], do_copy_unchanged_raw: bool = True,
+                    workers: Optional[int] = None, compression_policy: CompressionPolicy = None,
+                    executor: Executor = None) -> None:
+        fingerprint = await self._storage.loader.asave(dest, do_copy_unchanged_raw=do_copy_unchanged_raw,
+                                                       workers=workers, compression_policy=compression_policy,
+                                                       executor=executor)
+        if self._cache_store is not None:
+            # the cache is changed on the loop thread, so it's dumped here, only writing the file goes to the executor.
+            # It's marked saved right away, values cached meanwhile mark it changed again
+            cache = self._storage.dump_persisting_cache()
+            self._storage.cacher.mark_persisting_cache_saved()
+            await run_in_executor(executor, self._cache_store.put_cache, fingerprint, cache)
 
-    def save(self, dest: Union[BinaryIO, BytesIO]) -> None:
-        self._storage.loader.save(dest)
+    def save_in_place(self, workers: Optional[int] = None, compression_policy: CompressionPolicy = None) -> None:
+        self._storage.loader.save_in_place(workers=workers, compression_policy=compression_policy)
+        self._put_cache_to_store(self._storage.loader.get_fingerprint())
+
+    def compact(self, compression_policy: CompressionPolicy = None) -> None:
+        self._storage.loader.compact(compression_policy=compression_policy)
+        self._put_cache_to_store(self._storage.loader.get_fingerprint())
+
+    @property
+    def cache_store(self) -> Optional[CacheStore]:
+        return self._cache_store
+
+    def store_cache(self) -> None:
+        """
+        Puts the cache to the store under the fingerprint of the source, e.g. after reading an unchanged presentation.
+        """
+
+        if self._cache_store is None:
+            raise ValueError('Container has no cache store')
+        if self._storage.loader.has_changes():
+            raise ValueError('Presentation has unsaved changes, cache doesn\'t match its source')
+        self._put_cache_to_store(self._storage.loader.get_fingerprint())
 
     def dump_cache(self) -> Dict[str, Any]:
-        return self._storage.cacher.dump_persisting_cache()
+        return self._storage.dump_persisting_cache()
+
+    def load_cache_file(self, path: str) -> None:
+        """
+        Loads the persisting cache saved by dump_cache_file() instead of the current one.
+        Its branches are decoded from the memory-mapped file only when they are needed.
+        """
+
+        self._storage.load_persisting_cache_file(path)
+
+    def dump_cache_file(self, path: str) -> None:
+        dump_cache_file(self._storage.dump_persisting_cache(), path)
+
+    def snapshot(self, path: str, do_embed_source: bool = False) -> None:
+        """
+        Saves the changes, the caches and the file index, so the container can be restored by from_snapshot().
+        :param do_embed_source: embed the source pptx even if it was opened from a file
+        """
+
+        snapshot = {
+            'loader': self._storage.loader.dump_snapshot(do_embed_source=do_embed_source),
+            'cacher': self._storage.cacher.dump_snapshot(),
+            'do_log_stats': self._storage.do_log_stats,
+        }
+        with open(path, mode='wb') as f:
+            f.write(_SNAPSHOT_HEADER)
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_snapshot(cls, path: str):
+        """
+        Snapshot is a pickle, so it must come from a trusted source.
+        """
+
+        with open(path, mode='rb') as f:
+            if f.read(len(_SNAPSHOT_HEADER)) != _SNAPSHOT_HEADER:
+                raise ValueError(f'{path} is not a snapshot of a supported version')
+            snapshot = pickle.load(f)
+
+        container = cls()
+        container._storage = PresentationStorage(Loader.load_snapshot(snapshot['loader']),
+                                                 Cacher.load_snapshot(snapshot['cacher']),
+                                                 do_log_stats=snapshot['do_log_stats'])
+        return container
 
     def duplicate(self):
         new_container = PresentationContainer()
-        new_container._storage._loader = self._storage.loader.duplicate()
-        new_container._storage._cacher = self._storage.cacher.duplicate()
+        new_container._storage = PresentationStorage(self._storage.loader.duplicate(),
+                                                     self._storage.cacher.duplicate(),
+                                                     do_log_stats=self._storage.do_log_stats)
+        new_container._cache_store = self._cache_store
         return new_container
 
     @property
     def presentation(self) -> Presentation:
         return Presentation(self._storage, self._root_cache_key)
 
+    def get_stats_report(self) -> Dict[str, Any]:
+        """
+        Hits and misses of the caches. Stats of every cached property are collected while do_log_stats is on,
+        see Stats.make_report().
+        """
+
+        return self._storage.stats.make_report()
+
     @property
     def is_cache_changed_since_load(self) -> bool:
         return self._storage.cacher.is_persisting_cache_changed_since_load
 
     def mark_cache_saved(self) -> bool:
         return self._storage.cacher.mark_persisting_cache_saved()
+
+    def _load_cache_from_store(self) -> None:
+        if self._cache_store is None:
+            return
+        fingerprint = self._storage.loader.get_fingerprint()
+        path = self._cache_store.get_cache_file(fingerprint)
+        if path is None:
+            return
+        try:
+            self._storage.load_persisting_cache_file(path)
+        except OSError:
+            pass  # removed by another process, cache is just built again
+        except ValueError:
+            self._cache_store.remove(fingerprint)  # broken, cache is just built again
+
+    def _put_cache_to_store(self, fingerprint: str) -> None:
+        if self._cache_store is None:
+            return
+        self._cache_store.put_cache(fingerprint, self._storage.dump_persisting_cache())
+        self._storage.cacher.mark_persisting_cache_saved()
+
+
+class TemplateBase:
+    """
+    Template parsed once and shared by the containers opened from it.
+    Every container copies the parsed parts it reads from the template instead of reading and parsing them again,
+    so it holds its changed parts plus copies of the read ones, bounded by xml_cache_budget of open().
+    """
+
+    def __init__(self, file: Union[str, BinaryIO, BytesIO], cache: Dict[str, Any] = None,
+                 xml_parser_options: XmlParserOptions = None, workers: Optional[int] = None):
+        """
+        :param file: path or file object
+        """
+
+        self._loader = Loader(xml_parser_options)
+        if isinstance(file, str):
+            self._loader.load_path(file)
+        else:
+            self._loader.load(file)
+        self._loader.freeze(workers=workers)
+
+        self._cacher = Cacher()
+        if cache is not None:
+            self._cacher.load_persisting_cache(cache)
+            drop_stale_persisting_cache(self._loader, self._cacher)
+            map_untracked_persisting_cache(self._loader, self._cacher)
+
+    def open(self, do_log_stats: bool = False, xml_cache_budget: Optional[int] = None,
+             local_handles_budget: Optional[int] = None) -> PresentationContainer:
+        cacher = self._cacher.duplicate()
+        cacher.local_handles_budget = local_handles_budget
+
+        container = PresentationContainer()
+        container._storage = PresentationStorage(self._loader.make_overlay(xml_cache_budget=xml_cache_budget),
+                                                 cacher,
+                                                 do_log_stats=do_log_stats)
+        return container
+
+    def warm_cache(self, warmer: Callable[[Presentation], Any]) -> None:
+        """
+        Runs warmer over a container opened from the template and keeps its persisting cache for the next ones.
+        :param warmer: must read the presentation only
+        """
+
+        container = self.open()
+        warmer(container.presentation)
+
+        # noinspection PyProtectedMember
+        if container._storage.loader.has_changes():
+            raise ValueError('Warmer must not change the presentation')
+
+        # noinspection PyProtectedMember
+        self._cacher = container._storage.cacher.duplicate()
+
+    def dump_cache(self) -> Dict[str, Any]:
+        cache = self._cacher.dump_persisting_cache()
+        stamp_persisting_cache(self._loader, cache)
+        return cache
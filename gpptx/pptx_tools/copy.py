@@ -8,6 +8,7 @@ from gpptx.pptx_tools.paths import find_last_index_of_content, absolutize_filepa
 from gpptx.pptx_tools.rels import create_blank_rels
 from gpptx.pptx_tools.xml_namespaces import pptx_xml_ns
 from gpptx.storage.pptx.loader import Loader
+from gpptx.util.tracing import traced
 
 _PATH_DIR_CONTENT_NAME_EXT_REGEX = re.compile(r'^\.\./(.+?)/(.+?)\d+\.(.+)$')
 
@@ -37,6 +38,7 @@ class _CopyRelationState:
         return self._dests
 
 
+@traced('pptx_tools.copy_relations_recursively')
 def copy_relations_recursively(src_loader: Loader, src_rels_filepath: str,
                                dest_loader: Loader, dest_rels_filepath: str,
                                state: Optional[_CopyRelationState] = None) -> Iterable[str]:
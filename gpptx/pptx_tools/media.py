@@ -1,11 +1,14 @@
 from gpptx.pptx_tools.paths import MEDIA_PATH_PREFIX
 from gpptx.pptx_tools.rels import get_all_relation_paths_in_rels
 from gpptx.storage.pptx.loader import Loader
+from gpptx.util.tracing import traced
 
 
+@traced('pptx_tools.delete_unused_media')
 def delete_unused_media(loader: Loader) -> None:
-    media_filepaths = [it for it in loader.get_filelist() if it.startswith(MEDIA_PATH_PREFIX) and not it.endswith('.rels')]
-    rels_filepaths = [it for it in loader.get_filelist() if it.endswith('.rels')]
+    media_filepaths = [it for it in loader.part_index.get_dir_paths(MEDIA_PATH_PREFIX, do_include_subdirs=True)
+                       if not it.endswith('.rels')]
+    rels_filepaths = list(loader.part_index.rels_paths)
 
     media_used_filepaths = set()
 
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Optional, List
 
 SLIDES_PATH_PREFIX = 'ppt/slides/'
 SLIDES_PATH_PREFIX_WITH_FILE = 'ppt/slides/slide'
@@ -9,6 +9,7 @@ SLIDE_LAYOUTS_PATH_PREFIX = 'ppt/slideLayouts/'
 SLIDE_LAYOUTS_PATH_PREFIX_WITH_FILE = 'ppt/slideLayouts/slideLayout'
 THEMES_PATH_PREFIX = 'ppt/theme/theme'
 THEMES_PATH_PREFIX_WITH_FILE = 'ppt/theme/theme'
+THEMES_DIR_PATH_PREFIX = 'ppt/theme/'
 MEDIA_PATH_PREFIX = 'ppt/media/'
 MEDIA_IMAGES_PATH_PREFIX = 'ppt/media/image/'
 ROOT_RELS_PATH_PREFIX = 'ppt/_rels/'
@@ -65,17 +66,8 @@ def find_last_index_of_content(loader, content_name: str, dir_name: Optional[str
     if dir_name is None:
         dir_name = f'{content_name}s'
 
-    path_index_regex = re.compile(rf'^ppt/{dir_name}/{content_name}(\d+)')
+    return loader.part_index.get_last_index(f'ppt/{dir_name}/', content_name)
 
-    last_index = 0
 
-    for filename in loader.get_filelist():
-        if not filename.startswith(f'ppt/{dir_name}/'):
-            continue
-        if filename.endswith('.rels'):
-            continue
-        result = path_index_regex.match(filename)
-        index = int(result.group(1))
-        last_index = max(last_index, index)
-
-    return last_index
+def find_slide_paths(loader) -> List[str]:
+    return loader.part_index.get_content_paths(SLIDES_PATH_PREFIX, 'slide')
@@ -5,6 +5,7 @@ from gpptx.pptx_tools.presentation import delete_slide_mention_in_presentation
 from gpptx.pptx_tools.rels import find_relation_id_in_rels, delete_mention_in_rels
 from gpptx.pptx_tools.xml_namespaces import pptx_xml_ns
 from gpptx.storage.pptx.loader import Loader
+from gpptx.util.tracing import traced
 
 
 def delete_mention_in_slide(loader: Loader, slide_id: int, slide_id_to_delete: int):
@@ -28,6 +29,7 @@ def delete_shapes_with_relation(loader: Loader, slide_filepath: str, r_id_to_del
     loader.save_file_xml(slide_filepath, xml)
 
 
+@traced('pptx_tools.delete_slide')
 def delete_slide(loader: Loader, slide_index: int, do_garbage_collection: bool = True):
     slide_filepath = make_slide_path(slide_index)
     slide_rels_filepath = make_rels_path(slide_filepath)
@@ -60,6 +62,7 @@ def delete_slide(loader: Loader, slide_index: int, do_garbage_collection: bool =
     delete_mention_in_content_type(loader=loader, filepath=slide_filepath)
 
 
+@traced('pptx_tools.delete_all_slides_except')
 def delete_all_slides_except(loader: Loader, slide_index: int) -> None:
     last_slide_index = find_last_index_of_content(loader=loader, content_name='slide')
 
@@ -0,0 +1,442 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from functools import wraps
+from typing import Any, Dict, List, Union, Tuple, Set, Callable
+
+_MAGIC = b'GPPTXC'
+_VERSION = 1
+
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_FLOAT = 4
+_TAG_STR = 5
+_TAG_LIST = 6
+_TAG_TUPLE = 7
+_TAG_BRANCH = 8
+_TAG_INT_ARRAY = 9
+_TAG_FLOAT_ARRAY = 10
+_TAG_STR_ARRAY = 11
+
+_FLOAT_STRUCT = struct.Struct('<d')
+_IS_LITTLE_ENDIAN = array('H', [1]).tobytes() == b'\x01\x00'
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def dump_cache_file(cache: Dict[str, Any], path: str) -> None:
+    """
+    Writes the persisting cache in the binary format, atomically.
+    """
+
+    dir_, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=dir_)
+    try:
+        with os.fdopen(fd, mode='wb') as f:
+            f.write(dumps_cache(cache))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_cache_file(path: str, do_use_mmap: bool = True) -> Dict[str, Any]:
+    with open(path, mode='rb') as f:
+        if not do_use_mmap or os.fstat(f.fileno()).st_size == 0:
+            return loads_cache(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads_cache(data)
+
+
+def load_cache_file_flat(path: str) -> Tuple[Dict[tuple, Any], Dict[tuple, Set[str]]]:
+    """
+    Loads only the root branch, its inner branches are left as LazyBranch values,
+    which decode from the memory-mapped file when they are needed.
+    :return: values by their paths and names of the sons by the paths of the branches, see CachePrefixTree
+    """
+
+    with open(path, mode='rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError('Not a cache file')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # stays open while lazy branches need it
+
+    values = dict()
+    sons = dict()
+    try:
+        _make_decoder(data).read_root_branch_level(values, sons)
+    except ValueError:
+        data.close()
+        raise
+    return values, sons
+
+
+def dumps_cache(cache: Dict[str, Any]) -> bytes:
+    """
+    Format: magic, version, string table of all the names and the str values, then the tree.
+    Ints are zigzag varints, lists of a single plain type are stored as typed arrays.
+    Every branch keeps the size of its body, so it can be skipped and decoded later.
+    """
+
+    encoder = _Encoder()
+    encoder.write_value(cache)
+
+    header = bytearray(_MAGIC)
+    header.append(_VERSION)
+    _write_varint(header, len(encoder.strings))
+    for s in encoder.strings:
+        encoded = s.encode('utf-8')
+        _write_varint(header, len(encoded))
+        header += encoded
+
+    return bytes(header + encoder.out)
+
+
+def get_encoded_size(value: Any) -> int:
+    """
+    :return: size of the value in a cache file, as if its strings were not shared with other values
+    """
+
+    encoder = _Encoder()
+    encoder.write_value(value)
+
+    strings_size = bytearray()
+    for s in encoder.strings:
+        encoded = s.encode('utf-8')
+        _write_varint(strings_size, len(encoded))
+        strings_size += encoded
+    return len(encoder.out) + len(strings_size)
+
+
+def loads_cache(data: Buffer) -> Dict[str, Any]:
+    value = _make_decoder(data).read_value()
+    if not isinstance(value, dict):
+        raise ValueError('Cache file root is not a branch')
+    return value
+
+
+class LazyBranch:
+    """
+    Branch of a cache file which is not decoded yet.
+    """
+
+    __slots__ = ('_decoder', '_pos')
+
+    def __init__(self, decoder, pos: int):
+        self._decoder: _Decoder = decoder
+        self._pos = pos
+
+    def load_level(self, path: tuple, values: Dict[tuple, Any], sons: Dict[tuple, Set[str]]) -> None:
+        """
+        Puts the values of the branch by their paths under the path, inner branches stay lazy.
+        """
+
+        self._decoder.read_branch_level(self._pos, path, values, sons)
+
+    def load_nested(self) -> Dict[str, Any]:
+        return self._decoder.read_branch(self._pos)
+
+    def __deepcopy__(self, memo):
+        return self  # immutable
+
+
+def _make_decoder(data: Buffer):
+    if len(data) <= len(_MAGIC) or data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError('Not a cache file')
+    if data[len(_MAGIC)] != _VERSION:
+        raise ValueError(f'Unsupported cache file version {data[len(_MAGIC)]}')
+
+    decoder = _Decoder(data, len(_MAGIC) + 1)
+    decoder.read_strings()
+    return decoder
+
+
+class _Encoder:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: List[str] = list()
+        self._string_indexes: Dict[str, int] = dict()
+
+    def write_value(self, value: Any) -> None:
+        out = self.out
+
+        if value is None:
+            out.append(_TAG_NONE)
+        elif value is True:
+            out.append(_TAG_TRUE)
+        elif value is False:
+            out.append(_TAG_FALSE)
+        elif isinstance(value, int):
+            out.append(_TAG_INT)
+            _write_varint(out, _zigzag(int(value)))
+        elif isinstance(value, float):
+            out.append(_TAG_FLOAT)
+            out += _FLOAT_STRUCT.pack(value)
+        elif isinstance(value, str):
+            out.append(_TAG_STR)
+            _write_varint(out, self._get_string_index(value))
+        elif isinstance(value, dict):
+            self._write_branch(value)
+        elif isinstance(value, list):
+            self._write_list(value)
+        elif isinstance(value, tuple):
+            out.append(_TAG_TUPLE)
+            _write_varint(out, len(value))
+            for it in value:
+                self.write_value(it)
+        else:
+            raise ValueError(f'Value of type {type(value)} is not allowed in cache file')
+
+    def _write_branch(self, value: Dict[str, Any]) -> None:
+        out = self.out
+
+        self.out = bytearray()
+        for k, v in value.items():
+            _write_varint(self.out, self._get_string_index(k))
+            self.write_value(v)
+        body = self.out
+        self.out = out
+
+        out.append(_TAG_BRANCH)
+        _write_varint(out, len(value))
+        _write_varint(out, len(body))
+        out += body
+
+    def _write_list(self, value: list) -> None:
+        out = self.out
+
+        if len(value) > 0:
+            if all(type(it) is int for it in value):
+                out.append(_TAG_INT_ARRAY)
+                _write_varint(out, len(value))
+                for it in value:
+                    _write_varint(out, _zigzag(it))
+                return
+            if all(type(it) is float for it in value):
+                out.append(_TAG_FLOAT_ARRAY)
+                _write_varint(out, len(value))
+                floats = array('d', value)
+                if not _IS_LITTLE_ENDIAN:
+                    floats.byteswap()
+                out += floats.tobytes()
+                return
+            if all(type(it) is str for it in value):
+                out.append(_TAG_STR_ARRAY)
+                _write_varint(out, len(value))
+                for it in value:
+                    _write_varint(out, self._get_string_index(it))
+                return
+
+        out.append(_TAG_LIST)
+        _write_varint(out, len(value))
+        for it in value:
+            self.write_value(it)
+
+    def _get_string_index(self, s: str) -> int:
+        index = self._string_indexes.get(s)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(s)
+            self._string_indexes[s] = index
+        return index
+
+
+def _raising_value_error_on_bad_data(fn: Callable) -> Callable:
+    """
+    Reads past the end of truncated data and bad indexes of strings raise ValueError, as other broken data does.
+    They aren't checked in the decoding loops, the errors are converted once per call of the decorated method.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except (IndexError, struct.error) as e:
+            raise ValueError(f'Broken cache file: {e}') from e
+
+    return wrapper
+
+
+class _Decoder:
+    """
+    Leaves are decoded inline in one loop per branch, with one-byte varints on a fast path,
+    since the per-value overhead is what decides the speed of loading.
+    """
+
+    def __init__(self, data: Buffer, pos: int):
+        self._data = data
+        self._pos = pos
+        self._strings: List[str] = list()
+
+    @_raising_value_error_on_bad_data
+    def read_strings(self) -> None:
+        data = self._data
+        pos = self._pos
+        count, pos = _read_varint(data, pos)
+        strings = self._strings
+        for _ in range(count):
+            size, pos = _read_varint(data, pos)
+            if pos + size > len(data):
+                raise ValueError('Broken cache file: string table is truncated')
+            strings.append(str(data[pos:pos + size], 'utf-8'))
+            pos += size
+        self._pos = pos
+
+    @_raising_value_error_on_bad_data
+    def read_value(self) -> Any:
+        value, self._pos = self._read_value(self._data, self._pos)
+        return value
+
+    @_raising_value_error_on_bad_data
+    def read_branch(self, pos: int) -> Dict[str, Any]:
+        """
+        :param pos: position of the branch tag
+        """
+
+        branch, _ = self._read_branch(self._data, pos + 1)
+        return branch
+
+    def read_root_branch_level(self, values: Dict[tuple, Any], sons: Dict[tuple, Set[str]]) -> None:
+        self.read_branch_level(self._pos, (), values, sons)
+
+    @_raising_value_error_on_bad_data
+    def read_branch_level(self, pos: int, path: tuple, values: Dict[tuple, Any], sons: Dict[tuple, Set[str]]) -> None:
+        """
+        :param pos: position of the branch tag
+        """
+
+        data = self._data
+        strings = self._strings
+
+        if data[pos] != _TAG_BRANCH:
+            raise ValueError(f'No cache file branch at {pos}')
+        count, pos = _read_varint(data, pos + 1)
+        _, pos = _read_varint(data, pos)  # body size
+
+        branch_sons = set()
+        sons[path] = branch_sons
+        for _ in range(count):
+            name_index, pos = _read_varint(data, pos)
+            name = strings[name_index]
+            branch_sons.add(name)
+
+            if data[pos] == _TAG_BRANCH:
+                values[path + (name,)] = LazyBranch(self, pos)
+                _, pos = _read_varint(data, pos + 1)
+                body_size, pos = _read_varint(data, pos)
+                pos += body_size
+            else:
+                values[path + (name,)], pos = self._read_value(data, pos)
+
+    def _read_value(self, data: Buffer, pos: int) -> Tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+
+        if tag == _TAG_BRANCH:
+            return self._read_branch(data, pos)
+        if tag == _TAG_INT:
+            value, pos = _read_varint(data, pos)
+            return _unzigzag(value), pos
+        if tag == _TAG_STR:
+            index, pos = _read_varint(data, pos)
+            return self._strings[index], pos
+        if tag == _TAG_NONE:
+            return None, pos
+        if tag == _TAG_FLOAT:
+            return _FLOAT_STRUCT.unpack_from(data, pos)[0], pos + _FLOAT_STRUCT.size
+        if tag == _TAG_TRUE:
+            return True, pos
+        if tag == _TAG_FALSE:
+            return False, pos
+        if tag == _TAG_INT_ARRAY:
+            count, pos = _read_varint(data, pos)
+            values = list()
+            for _ in range(count):
+                value, pos = _read_varint(data, pos)
+                values.append(_unzigzag(value))
+            return values, pos
+        if tag == _TAG_STR_ARRAY:
+            count, pos = _read_varint(data, pos)
+            values = list()
+            for _ in range(count):
+                index, pos = _read_varint(data, pos)
+                values.append(self._strings[index])
+            return values, pos
+        if tag == _TAG_FLOAT_ARRAY:
+            count, pos = _read_varint(data, pos)
+            floats = array('d')
+            if pos + count * floats.itemsize > len(data):
+                raise ValueError('Broken cache file: float array is truncated')
+            floats.frombytes(data[pos:pos + count * floats.itemsize])
+            if not _IS_LITTLE_ENDIAN:
+                floats.byteswap()
+            return floats.tolist(), pos + count * floats.itemsize
+        if tag == _TAG_LIST or tag == _TAG_TUPLE:
+            count, pos = _read_varint(data, pos)
+            values = list()
+            for _ in range(count):
+                value, pos = self._read_value(data, pos)
+                values.append(value)
+            return (values if tag == _TAG_LIST else tuple(values)), pos
+        raise ValueError(f'Bad cache file tag {tag} at {pos - 1}')
+
+    def _read_branch(self, data: Buffer, pos: int) -> Tuple[Dict[str, Any], int]:
+        strings = self._strings
+        branch = dict()
+
+        count, pos = _read_varint(data, pos)
+        _, pos = _read_varint(data, pos)  # body size
+        for _ in range(count):
+            name_index = data[pos]
+            pos += 1
+            if name_index & 0x80:
+                name_index, pos = _read_varint(data, pos - 1)
+            name = strings[name_index]
+
+            # the most common leaves inline
+            tag = data[pos]
+            if tag == _TAG_INT and not data[pos + 1] & 0x80:
+                value = data[pos + 1]
+                branch[name] = value >> 1 if not value & 1 else -((value + 1) >> 1)
+                pos += 2
+            elif tag == _TAG_BRANCH:
+                branch[name], pos = self._read_branch(data, pos + 1)
+            elif tag == _TAG_STR and not data[pos + 1] & 0x80:
+                branch[name] = strings[data[pos + 1]]
+                pos += 2
+            else:
+                branch[name], pos = self._read_value(data, pos)
+
+        return branch, pos
+
+
+def _read_varint(data: Buffer, pos: int) -> Tuple[int, int]:
+    b = data[pos]
+    pos += 1
+    result = b & 0x7f
+    shift = 7
+    while b & 0x80:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        shift += 7
+    return result, pos
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
@@ -1,9 +1,20 @@
-import copy
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Set, Iterator
+
+from gpptx.storage.cache.cache_file import load_cache_file_flat, LazyBranch
+from gpptx.storage.cache.persistent_dict import PersistentDict
 
 
 class CacheKey:
-    __slots__ = ('name', 'parent', 'root', 'do_disable_cache', 'postfix')
+    """
+    Sons made by make_son() are memoized, so every path under a root is made once and shared.
+    Keys are equal when their paths are, the path and the hash are calculated once.
+    Postfix is a part of the path, but not of the paths of the sons.
+    """
+
+    __slots__ = ('name', 'parent', 'root', 'do_disable_cache', 'postfix', 'path', '_hash', '_sons', '_plain',
+                 '_postfixed')
 
     def __init__(self, name: str, parent=None, do_disable_cache: bool = None):
         self.name = name
@@ -12,8 +23,11 @@ class CacheKey:
 
         if self.parent is None:
             self.root: CacheKey = self
+            self.path: Tuple[str, ...] = (name,)
         else:
             self.root: CacheKey = self.parent.root
+            self.path: Tuple[str, ...] = self.parent.path + (name,)
+        self._hash = hash(self.path)
 
         if do_disable_cache is not None:
             self.do_disable_cache = do_disable_cache
@@ -23,132 +37,477 @@ class CacheKey:
             else:
                 self.do_disable_cache = False
 
-    def __str__(self) -> str:
-        reversed_path: List[str] = list()
+        self._sons: Dict[str, CacheKey] = dict()
+        self._plain: CacheKey = self
+        self._postfixed: Optional[Dict[str, CacheKey]] = None
 
-        if self.postfix is not None:
-            reversed_path.append(self.postfix)
+    def __str__(self) -> str:
+        return '/'.join(self.path)
 
-        current_key = self
-        while current_key is not None:
-            reversed_path.append(current_key.name)
-            current_key = current_key.parent
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, CacheKey):
+            return NotImplemented
+        return self._hash == other._hash and self.path == other.path
 
-        return '/'.join(reversed(reversed_path))
+    def __hash__(self) -> int:
+        return self._hash
 
     @property
     def this_or_son_from_postfix(self):
         if self.postfix is None:
             return self
         else:
-            return self.make_son(self.postfix)
+            return self._plain.make_son(self.postfix)
 
     def make_son(self, name: str):
-        return CacheKey(name, parent=self)
+        son = self._sons.get(name)
+        if son is None:
+            son = CacheKey(name, parent=self._plain)
+            self._sons[name] = son
+        return son
+
+    def with_postfix(self, postfix: Optional[str]):
+        """
+        :return: the same key with another postfix, keys are shared, so their postfix is never changed in place
+        """
+
+        plain = self._plain
+        if postfix is None:
+            return plain
+
+        if plain._postfixed is None:
+            plain._postfixed = dict()
+        key = plain._postfixed.get(postfix)
+        if key is None:
+            key = CacheKey.__new__(CacheKey)
+            key.name = plain.name
+            key.parent = plain.parent
+            key.root = plain.root
+            key.do_disable_cache = plain.do_disable_cache
+            key.postfix = postfix
+            key.path = plain.path + (postfix,)
+            key._hash = hash(key.path)
+            key._sons = plain._sons
+            key._plain = plain
+            key._postfixed = None
+            plain._postfixed[postfix] = key
+        return key
+
+
+_MISSING = object()
+
+CachePath = Tuple[str, ...]
 
 
 class CachePrefixTree:
+    """
+    Values are kept in one dict by the path of their key, with the names of the sons of every branch indexed aside
+    for the operations over whole branches. Dumped as nested dicts, a dict per branch.
+    Both dicts are persistent, so duplicates share everything they haven't changed.
+    """
+
     def __init__(self):
-        self._tree = dict()
+        self._values = PersistentDict()
+        self._sons = self._make_sons_dict({(): set()})
+        self._has_lazy_branches = False
 
     def __getitem__(self, key: CacheKey) -> Tuple[Any, bool]:
-        # reverse linked list using recursion
-        def rec(k: CacheKey):
-            if k.root == k:
-                branch = self._tree  # start
-                parent_exists = True
-            else:
-                branch, parent_exists = rec(k.parent)
+        path = self._make_path(key)
 
-            if not parent_exists or branch is None:
-                return None, False  # traverse fail
-
-            if k != key:
-                inner_branch = branch.get(k.name)  # traverse
-                return inner_branch, inner_branch is not None
-            else:
-                value = branch.get(k.name)  # actual value get
-                if value is None:
-                    return value, k in branch
-                else:
-                    return value, True
+        value = self._values.get(path, _MISSING)
+        if value is not _MISSING:
+            if type(value) is LazyBranch:
+                return value.load_nested(), True
+            return value, True
 
-        return rec(key.this_or_son_from_postfix)
+        if path in self._sons:
+            return self._make_nested_branch(path), True
+        if self._has_lazy_branches and self._load_lazy_ancestor(path):
+            return self[key]
+        return None, False
 
     def __setitem__(self, key: CacheKey, value: Any) -> None:
-        def rec(k: CacheKey):
-            if k.root == k:
-                branch = self._tree
-            else:
-                branch = rec(k.parent)
-
-            if k != key:
-                inner_branch = branch.get(k.name)
-                if inner_branch is None:
-                    inner_branch = dict()
-                    branch[k.name] = inner_branch
-                return inner_branch
-            else:
-                branch[k.name] = value
-
-        rec(key.this_or_son_from_postfix)
+        path = self._make_path(key)
+        self._load_lazy_ancestors(path)
+        if path in self._sons:
+            self._delete_branch(path)  # value replaces a branch
+        self._values[path] = value
+        self._add_to_sons(path)
 
     def __delitem__(self, key: CacheKey) -> None:
-        def rec(k: CacheKey):
-            if k.root == k:
-                branch = self._tree
-            else:
-                branch = rec(k.parent)
+        path = self._make_path(key)
+        self._load_lazy_ancestors(path)
+        if path in self._values or path in self._sons:
+            self._delete_branch(path)
+            self._sons.get_for_update(path[:-1]).discard(path[-1])
 
-            if branch is None:
-                return None
+    def __contains__(self, key: CacheKey) -> bool:
+        path = self._make_path(key)
+        if path in self._values or path in self._sons:
+            return True
+        if self._has_lazy_branches and self._load_lazy_ancestor(path):
+            return key in self
+        return False
 
-            if k != key:
-                inner_branch = branch.get(k.name)
-                return inner_branch
-            else:
-                if k.name in branch:
-                    del branch[k.name]
+    def rename(self, key: CacheKey, new_name: str) -> None:
+        path = self._make_path(key)
+        new_path = path[:-1] + (new_name,)
+        if new_path == path:
+            return
+        self._load_lazy_ancestors(path)
+
+        if new_path in self._values or new_path in self._sons:
+            self._delete_branch(new_path)
+            self._sons.get_for_update(new_path[:-1]).discard(new_name)
+
+        if path not in self._values and path not in self._sons:
+            return
+
+        for old_it_path in list(self._iter_branch_paths(path)):
+            new_it_path = new_path + old_it_path[len(path):]
+            value = self._values.pop(old_it_path, _MISSING)
+            if value is not _MISSING:
+                self._values[new_it_path] = value
+            sons = self._sons.pop(old_it_path, None)
+            if sons is not None:
+                self._sons[new_it_path] = set(sons)  # may come from a shared layer
+
+        parent_sons = self._sons.get_for_update(path[:-1])
+        parent_sons.discard(path[-1])
+        parent_sons.add(new_name)
+
+    def merge_inner_tree(self, tree: Dict[str, Any]) -> bool:
+        """
+        Puts the values of the nested dicts which are not in the tree yet, the ones in the tree are kept.
+        :return: was anything put
+        """
+
+        return self._merge_nested_branch((), tree)
+
+    def get_son_names(self, key: CacheKey) -> Set[str]:
+        path = self._make_path(key)
+        self._load_lazy_ancestors(path)
+        value = self._values.get(path)
+        if type(value) is LazyBranch:
+            del self._values[path]
+            value.load_level(path, self._values, self._sons)
+        return set(self._sons.get(path, ()))
 
-        rec(key.this_or_son_from_postfix)
+    def get_inner_tree(self) -> Dict[str, Any]:
+        return self._make_nested_branch(())
 
-    def __contains__(self, key: CacheKey) -> bool:
-        return self[key] is not None
+    def set_inner_tree(self, tree: Dict[str, Any]) -> None:
+        self._values = PersistentDict()
+        self._sons = self._make_sons_dict({(): set()})
+        self._has_lazy_branches = False
+        self._put_nested_branch((), tree)
+
+    def set_flat_tree(self, values: Dict[CachePath, Any], sons: Dict[CachePath, Set[str]]) -> None:
+        """
+        :param values: values by their paths, branches may be LazyBranch values
+        :param sons: names of the sons by the paths of the loaded branches, including the root ()
+        """
+
+        sons.setdefault((), set())
+        self._values = PersistentDict(values)
+        self._sons = self._make_sons_dict(sons)
+        self._has_lazy_branches = any(type(it) is LazyBranch for it in values.values())
 
-    def rename(self, key: CacheKey, new_name: str) -> None:
-        def rec(k: CacheKey):
-            if k.root == k:
-                branch = self._tree
+    def duplicate(self):
+        """
+        O(1), the duplicate shares all the branches with the tree until they are changed.
+        """
+
+        new_tree = CachePrefixTree()
+        new_tree._values = self._values.duplicate()
+        new_tree._sons = self._sons.duplicate()
+        new_tree._has_lazy_branches = self._has_lazy_branches
+        return new_tree
+
+    @staticmethod
+    def _make_sons_dict(sons: Dict[CachePath, Set[str]]) -> PersistentDict:
+        return PersistentDict(sons, copy_value_fn=set)
+
+    @staticmethod
+    def _make_path(key: CacheKey) -> CachePath:
+        return key.path
+
+    def _load_lazy_ancestor(self, path: CachePath) -> bool:
+        """
+        Loads the nearest existing ancestor of the path if it's lazy.
+        Lazy branches load a level at a time, so it's called until it returns False.
+        :return: was anything loaded
+        """
+
+        for i in range(len(path) - 1, 0, -1):
+            ancestor_path = path[:i]
+            value = self._values.get(ancestor_path, _MISSING)
+            if value is _MISSING:
+                if ancestor_path in self._sons:
+                    return False
+                continue
+            if type(value) is LazyBranch:
+                del self._values[ancestor_path]
+                value.load_level(ancestor_path, self._values, self._sons)
+                return True
+            return False
+        return False
+
+    def _load_lazy_ancestors(self, path: CachePath) -> None:
+        if self._has_lazy_branches:
+            while self._load_lazy_ancestor(path):
+                pass
+
+    def _add_to_sons(self, path: CachePath) -> None:
+        while len(path) > 0:
+            parent_path = path[:-1]
+            parent_sons = self._sons.get(parent_path)
+            if parent_sons is None:
+                self._sons[parent_path] = {path[-1]}
+            elif path[-1] in parent_sons:
+                return
+            else:
+                self._sons.get_for_update(parent_path).add(path[-1])
+                return
+            path = parent_path
+
+    def _iter_branch_paths(self, path: CachePath) -> Iterator[CachePath]:
+        yield path
+        for son in self._sons.get(path, ()):
+            yield from self._iter_branch_paths(path + (son,))
+
+    def _delete_branch(self, path: CachePath) -> None:
+        for it in list(self._iter_branch_paths(path)):
+            self._values.pop(it, None)
+            self._sons.pop(it, None)
+
+    def _make_nested_branch(self, path: CachePath) -> Dict[str, Any]:
+        branch = dict()
+        for son in self._sons.get(path, ()):
+            son_path = path + (son,)
+            value = self._values.get(son_path, _MISSING)
+            if value is _MISSING:
+                branch[son] = self._make_nested_branch(son_path)
+            elif type(value) is LazyBranch:
+                branch[son] = value.load_nested()
+            else:
+                branch[son] = value
+        return branch
+
+    def _merge_nested_branch(self, path: CachePath, branch: Dict[str, Any]) -> bool:
+        is_changed = False
+        for name, value in branch.items():
+            it_path = path + (name,)
+
+            existing_value = self._values.get(it_path, _MISSING)
+            if type(existing_value) is LazyBranch:
+                del self._values[it_path]
+                existing_value.load_level(it_path, self._values, self._sons)
+                existing_value = _MISSING
+            if existing_value is not _MISSING:
+                continue
+
+            if it_path in self._sons:
+                if isinstance(value, dict) and self._merge_nested_branch(it_path, value):
+                    is_changed = True
+                continue
+
+            if isinstance(value, dict):
+                self._put_nested_branch(it_path, value)
             else:
-                branch = rec(k.parent)
-
-            if k != key:
-                inner_branch = branch.get(k.name)
-                if inner_branch is None:
-                    inner_branch = dict()
-                    branch[k.name] = inner_branch
-                return inner_branch
+                self._values[it_path] = value
+            self._add_to_sons(it_path)
+            is_changed = True
+        return is_changed
+
+    def _put_nested_branch(self, path: CachePath, branch: Dict[str, Any]) -> None:
+        self._sons[path] = set(branch.keys())
+        values = self._values
+        for name, value in branch.items():
+            if isinstance(value, dict):
+                self._put_nested_branch(path + (name,), value)
             else:
-                branch[new_name] = branch[k.name]
-                del branch[k.name]
+                values[path + (name,)] = value
 
-        rec(key.this_or_son_from_postfix)
 
-    def get_inner_tree(self) -> Dict[str, Any]:
-        return self._tree
+class _Frame:
+    __slots__ = ('keys', 'parts')
+
+    def __init__(self):
+        self.keys: Set[CacheKey] = set()
+        self.parts: Set[str] = set()
 
-    def set_inner_tree(self, tree: Dict[str, Any]) -> None:
-        self._tree = tree
+
+class DependencyTracker:
+    """
+    Records what every cached value read while it was computed: other cached values and files of the loader.
+    Values are computed inside each other, so every thread keeps a stack of the values being computed,
+    and a read is noted by the innermost one.
+    Dependents of a value are found by its key or by any branch above it, the same way the caches delete them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._frames_count = 0  # in all threads, reads are noted only when some values are being computed
+        self._frames_count_lock = threading.Lock()
+        self._dependents_by_path = PersistentDict(copy_value_fn=set)
+        self._sons = PersistentDict(copy_value_fn=set)
+        self._dependents_by_part = PersistentDict(copy_value_fn=set)
+
+    def begin(self) -> None:
+        self._get_frames().append(_Frame())
+        with self._frames_count_lock:
+            self._frames_count += 1
+
+    def end(self, key: CacheKey) -> None:
+        """
+        Registers what was read since begin() as the dependencies of the value under the key.
+        """
+
+        frame = self._pop_frame()
+        for dependency_key in frame.keys:
+            self._add_key_dependent(dependency_key, key)
+        for part in frame.parts:
+            dependents = self._dependents_by_part.get_for_update(part)
+            if dependents is None:
+                self._dependents_by_part[part] = {key}
+            else:
+                dependents.add(key)
+        self.note_key_read(key)
+
+    def abort(self) -> None:
+        self._pop_frame()
+
+    def note_key_read(self, key: CacheKey) -> None:
+        if self._frames_count == 0:
+            return
+        frames = getattr(self._local, 'frames', None)
+        if frames:
+            frames[-1].keys.add(key)
+
+    def note_part_read(self, filepath: str) -> None:
+        if self._frames_count == 0:
+            return
+        frames = getattr(self._local, 'frames', None)
+        if frames:
+            frames[-1].parts.add(filepath)
+
+    def pop_key_dependents(self, key: CacheKey) -> Set[CacheKey]:
+        """
+        :return: dependents of the key and of the keys under it, they are forgotten
+        """
+
+        path = key.path
+        if path not in self._sons and path not in self._dependents_by_path:
+            return set()
+
+        dependents = set()
+        paths = [path]
+        while len(paths) > 0:
+            it_path = paths.pop()
+            dependents.update(self._dependents_by_path.pop(it_path, ()))
+            paths.extend(it_path + (son,) for son in self._sons.pop(it_path, ()))
+        if len(path) > 1:
+            parent_sons = self._sons.get_for_update(path[:-1])
+            if parent_sons is not None:
+                parent_sons.discard(path[-1])
+        return dependents
+
+    def pop_part_dependents(self, filepath: str) -> Set[CacheKey]:
+        return self._dependents_by_part.pop(filepath, set())
+
+    def duplicate(self):
+        """
+        Graph is shared with the duplicate until one of them changes it.
+        """
+
+        new_tracker = DependencyTracker()
+        new_tracker._dependents_by_path = self._dependents_by_path.duplicate()
+        new_tracker._sons = self._sons.duplicate()
+        new_tracker._dependents_by_part = self._dependents_by_part.duplicate()
+        return new_tracker
+
+    def _pop_frame(self) -> _Frame:
+        with self._frames_count_lock:
+            self._frames_count -= 1
+        return self._get_frames().pop()
+
+    def _get_frames(self) -> List[_Frame]:
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = list()
+            self._local.frames = frames
+        return frames
+
+    def _add_key_dependent(self, dependency_key: CacheKey, key: CacheKey) -> None:
+        path = dependency_key.path
+        dependents = self._dependents_by_path.get(path)
+        if dependents is None:
+            self._dependents_by_path[path] = {key}
+        elif key not in dependents:
+            self._dependents_by_path.get_for_update(path).add(key)
+
+        while len(path) > 1:
+            parent_sons = self._sons.get(path[:-1])
+            if parent_sons is None:
+                self._sons[path[:-1]] = {path[-1]}
+            elif path[-1] in parent_sons:
+                return
+            else:
+                self._sons.get_for_update(path[:-1]).add(path[-1])
+                return
+            path = path[:-1]
 
 
 class Cacher:
     _PERSISTING_CACHE_ALLOWED_TYPES = (int, float, str)
 
-    def __init__(self):
+    def __init__(self, local_handles_budget: Optional[int] = None):
+        """
+        :param local_handles_budget: max number of handles kept in local cache.
+            Least recently used ones are dropped and made again on demand.
+        """
+
         self._persisting_cache = CachePrefixTree()
+        # local values are kept apart by their kind: plain data is shared with duplicates,
+        # handles to xml elements and other objects bound to the storage never are
         self._local_cache = CachePrefixTree()
+        self._local_handles = CachePrefixTree()
+        self._local_handles_budget = local_handles_budget
+        self._local_handles_usage: Dict[CacheKey, None] = OrderedDict()
+        self._dependencies = DependencyTracker()
+        self._has_untracked_persisting_values = False
+        self._untracked_branches_by_part: Optional[Dict[str, Set[Tuple[str, str]]]] = None
         self._is_persisting_cache_changed_since_load = False
 
+    @property
+    def dependencies(self) -> DependencyTracker:
+        return self._dependencies
+
+    @property
+    def has_untracked_persisting_values(self) -> bool:
+        """
+        :return: whether persisting cache has values loaded or merged from a dumped cache,
+        their dependencies are unknown
+        """
+
+        return self._has_untracked_persisting_values
+
+    @property
+    def untracked_branches_by_part(self) -> Optional[Dict[str, Set[Tuple[str, str]]]]:
+        """
+        :return: the branches with untracked values by the parts they are based on, see part_stamps,
+        None until they are mapped after loading or merging. It's replaced, never changed, so it's shared by duplicates
+        """
+
+        return self._untracked_branches_by_part
+
+    @untracked_branches_by_part.setter
+    def untracked_branches_by_part(self, v: Optional[Dict[str, Set[Tuple[str, str]]]]) -> None:
+        self._untracked_branches_by_part = v
+
     def cache_persist(self, key: CacheKey, value: Any) -> None:
         if not self._is_ok_for_persisting_cache(value):
             raise ValueError(f'Value of type {type(value)} is not allowed for persisting cache')
@@ -157,23 +516,65 @@ class Cacher:
         self._is_persisting_cache_changed_since_load = True
 
     def cache_local(self, key: CacheKey, value: Any) -> None:
-        self._local_cache[key] = value
+        if self._is_ok_for_persisting_cache(value):
+            self._local_cache[key] = value
+            del self._local_handles[key]
+        else:
+            self.cache_local_handles(key, value)
+
+    def cache_local_handles(self, key: CacheKey, value: Any) -> None:
+        """
+        Same as cache_local(), for values which hold handles or are changed in place, even if they look like plain data.
+        """
+
+        self._local_handles[key] = value
+        del self._local_cache[key]
+        if self._local_handles_budget is not None:
+            self._touch_local_handle(key)
 
     def delete_from_persisting_cache(self, key: CacheKey) -> None:
         del self._persisting_cache[key]
+        self.invalidate_dependents(key)
 
     def delete_from_local_cache(self, key: CacheKey) -> None:
         del self._local_cache[key]
+        self._delete_local_handles(key)
+        self.invalidate_dependents(key)
 
     def delete_from_any_cache(self, key: CacheKey) -> None:
         self.delete_from_persisting_cache(key)
         self.delete_from_local_cache(key)
 
+    def delete_handles_from_local_cache(self, key: CacheKey) -> None:
+        """
+        Deletes everything except plain data (the same kind persisting cache allows) from the branch.
+        """
+
+        self._delete_local_handles(key)
+
     def rename_branch_in_persisting_cache(self, key: CacheKey, new_name: str) -> None:
         self._persisting_cache.rename(key, new_name)
+        self._invalidate_renamed_dependents(key, new_name)
 
     def rename_branch_in_local_cache(self, key: CacheKey, new_name: str) -> None:
         self._local_cache.rename(key, new_name)
+        self._local_handles.rename(key, new_name)
+        self._invalidate_renamed_dependents(key, new_name)
+
+    def invalidate_dependents(self, key: CacheKey) -> None:
+        """
+        Deletes the values which were computed from the value under the key or under its branch,
+        then the values computed from them and so on.
+        """
+
+        self._delete_dependents(self._dependencies.pop_key_dependents(key))
+
+    def invalidate_part_dependents(self, filepath: str) -> None:
+        """
+        Same as invalidate_dependents(), for the values which read the file.
+        """
+
+        self._delete_dependents(self._dependencies.pop_part_dependents(filepath))
 
     def rename_branch_in_any_cache(self, key: CacheKey, new_name: str) -> None:
         self.rename_branch_in_persisting_cache(key, new_name)
@@ -183,26 +584,87 @@ class Cacher:
         return self._persisting_cache[key]
 
     def get_from_local_cache(self, key: CacheKey) -> Tuple[Optional[Any], bool]:
+        value, do_exist = self._local_handles[key]
+        if do_exist:
+            if self._local_handles_budget is not None:
+                self._touch_local_handle(key)
+            return value, True
         return self._local_cache[key]
 
+    def get_son_names_in_persisting_cache(self, key: CacheKey) -> Set[str]:
+        return self._persisting_cache.get_son_names(key)
+
     def have_in_persisting_cache(self, key: CacheKey) -> Optional[Any]:
         return key in self._persisting_cache
 
     def have_in_local_cache(self, key: CacheKey) -> Optional[Any]:
-        return key in self._local_cache
+        return key in self._local_handles or key in self._local_cache
 
     def load_persisting_cache(self, cache: Dict[str, Any]) -> None:
         self._persisting_cache.set_inner_tree(cache)
+        self._mark_untracked_persisting_values()
+
+    def clear_persisting_cache(self) -> None:
+        self._persisting_cache = CachePrefixTree()
+        self._has_untracked_persisting_values = False
+        self._untracked_branches_by_part = None
+
+    def merge_persisting_cache(self, cache: Dict[str, Any]) -> None:
+        """
+        Adds the values of the dumped cache which are not cached yet, e.g. computed for the same contents elsewhere.
+        """
+
+        if self._persisting_cache.merge_inner_tree(cache):
+            self._mark_untracked_persisting_values()
+            self._is_persisting_cache_changed_since_load = True
 
     def dump_persisting_cache(self) -> Dict[str, Any]:
         return self._persisting_cache.get_inner_tree()
 
+    def load_persisting_cache_file(self, path: str) -> None:
+        self._persisting_cache.set_flat_tree(*load_cache_file_flat(path))
+        self._mark_untracked_persisting_values()
+
+    @property
+    def local_handles_budget(self) -> Optional[int]:
+        return self._local_handles_budget
+
+    @local_handles_budget.setter
+    def local_handles_budget(self, v: Optional[int]) -> None:
+        self._local_handles_budget = v
+        if v is None:
+            self._local_handles_usage.clear()
+        else:
+            self._evict_local_handles()
+
+    def dump_snapshot(self) -> Dict[str, Any]:
+        return {
+            'persisting_cache': self._persisting_cache.get_inner_tree(),
+            'local_cache': self._local_cache.get_inner_tree(),
+            'local_handles_budget': self._local_handles_budget,
+            'is_persisting_cache_changed_since_load': self._is_persisting_cache_changed_since_load,
+        }
+
+    @staticmethod
+    def load_snapshot(snapshot: Dict[str, Any]):
+        cacher = Cacher(snapshot.get('local_handles_budget'))
+        cacher._persisting_cache.set_inner_tree(snapshot['persisting_cache'])
+        cacher._local_cache.set_inner_tree(snapshot['local_cache'])
+        cacher._mark_untracked_persisting_values()
+        cacher._is_persisting_cache_changed_since_load = snapshot['is_persisting_cache_changed_since_load']
+        return cacher
+
     def duplicate(self):
-        new_cacher = Cacher()
+        new_cacher = Cacher(self._local_handles_budget)
 
-        new_cacher._persisting_cache = copy.deepcopy(self._persisting_cache)
-        new_cacher._local_cache = copy.deepcopy(self._local_cache)
-        new_cacher._is_persisting_cache_changed_since_load = self._is_in_persisting_cache_allowed_types
+        # trees are shared until changed, so it's O(1)
+        new_cacher._persisting_cache = self._persisting_cache.duplicate()
+        # handles are bound to this cacher's storage, the duplicate recreates them from its own loader
+        new_cacher._local_cache = self._local_cache.duplicate()
+        new_cacher._dependencies = self._dependencies.duplicate()
+        new_cacher._has_untracked_persisting_values = self._has_untracked_persisting_values
+        new_cacher._untracked_branches_by_part = self._untracked_branches_by_part
+        new_cacher._is_persisting_cache_changed_since_load = self._is_persisting_cache_changed_since_load
 
         return new_cacher
 
@@ -213,6 +675,42 @@ class Cacher:
     def mark_persisting_cache_saved(self):
         self._is_persisting_cache_changed_since_load = False
 
+    def _mark_untracked_persisting_values(self) -> None:
+        self._has_untracked_persisting_values = True
+        self._untracked_branches_by_part = None
+
+    def _invalidate_renamed_dependents(self, key: CacheKey, new_name: str) -> None:
+        self.invalidate_dependents(key)
+        if key.parent is not None:
+            self.invalidate_dependents(key.parent.make_son(new_name))
+
+    def _delete_dependents(self, keys: Set[CacheKey]) -> None:
+        keys = list(keys)
+        while len(keys) > 0:
+            key = keys.pop()
+            del self._persisting_cache[key]
+            del self._local_cache[key]
+            self._delete_local_handles(key)
+            keys.extend(self._dependencies.pop_key_dependents(key))
+
+    def _delete_local_handles(self, key: CacheKey) -> None:
+        # usage of the handles under the key, if it's a branch, is left to be evicted as is
+        del self._local_handles[key]
+        self._local_handles_usage.pop(key, None)
+
+    def _touch_local_handle(self, key: CacheKey) -> None:
+        if key in self._local_handles_usage:
+            self._local_handles_usage.move_to_end(key)
+            return
+
+        self._local_handles_usage[key] = None
+        self._evict_local_handles()
+
+    def _evict_local_handles(self) -> None:
+        while len(self._local_handles_usage) > self._local_handles_budget:
+            evicted_key, _ = self._local_handles_usage.popitem(last=False)
+            del self._local_handles[evicted_key]
+
     def _is_ok_for_persisting_cache(self, value: Any) -> bool:
         if value is None:
             return True
@@ -1,14 +1,19 @@
 import logging
+import time
 from abc import ABC
 from functools import update_wrapper, WRAPPER_ASSIGNMENTS
-from typing import Callable, List, Any, Dict, Collection, Type, Set
+from typing import Callable, List, Any, Dict, Collection, Type, Set, Tuple
 
+from gpptx.storage.cache.cache_file import get_encoded_size
 from gpptx.storage.cache.cacher import CacheKey
 from gpptx.storage.cache.lazy import LazyList, Lazy, LazyByFunction
 from gpptx.storage.storage import PresentationStorage
+from gpptx.util import tracing
 
 _logger = logging.getLogger(__name__)
 
+_cache_persist_property_names_by_class: Dict[Type, List[str]] = dict()
+
 
 class CacheDecoratable(ABC):
     __slots__ = ('_storage', '_storage_cache_key')
@@ -42,6 +47,27 @@ def help_lazy_list_property(f: Callable):
     return _CacheDecoratorLazyListHelperProperty(f)
 
 
+def find_cache_persist_properties(cls: Type) -> List[str]:
+    """
+    :return: names of the properties of the class which are cached in persisting cache
+    """
+
+    names = _cache_persist_property_names_by_class.get(cls)
+    if names is None:
+        names = list()
+        seen_names: Set[str] = set()
+        for klass in cls.__mro__:
+            for name, value in vars(klass).items():
+                if name in seen_names:
+                    continue  # overridden
+                seen_names.add(name)
+                # noinspection PyProtectedMember
+                if isinstance(value, _CacheDecoratorProperty) and value._do_use_persisting_cache:
+                    names.append(name)
+        _cache_persist_property_names_by_class[cls] = names
+    return names
+
+
 def clear_decorator_cache(obj: CacheDecoratable, func_name: str,
                           func_args: Collection[Any] = None, func_kwargs: Dict[str, Any] = None):
     # noinspection PyProtectedMember
@@ -66,6 +92,8 @@ def update_decorator_cache(obj: CacheDecoratable, func_name: str, value: Any, do
     else:
         # noinspection PyProtectedMember
         obj._storage.cacher.cache_local(son_cache_key, value)
+    # noinspection PyProtectedMember
+    obj._storage.cacher.invalidate_dependents(son_cache_key)
 
 
 class _BaseCacheDecorator(ABC):
@@ -89,18 +117,49 @@ class _BaseCacheDecorator(ABC):
         if not fn_self._storage_cache_key.do_disable_cache:
             value, do_exist = self._get_from_cache(call_cache_key, fn_self)
             if do_exist:
+                # noinspection PyProtectedMember
+                fn_self._storage.cacher.dependencies.note_key_read(call_cache_key)
+                # noinspection PyProtectedMember
+                if fn_self._storage.do_log_stats:
+                    # noinspection PyProtectedMember
+                    fn_self._storage.stats.track_property_hit(fn.__qualname__)
                 return value
 
         if args is None:
             args = tuple()
         if kwargs is None:
             kwargs = dict()
-        value = fn(fn_self, *args, **kwargs)
 
         # noinspection PyProtectedMember
-        if not fn_self._storage_cache_key.do_disable_cache:
+        if fn_self._storage_cache_key.do_disable_cache:
+            return fn(fn_self, *args, **kwargs)
+
+        # reads of other cached values and files while computing are noted as dependencies of the value
+        # noinspection PyProtectedMember
+        dependencies = fn_self._storage.cacher.dependencies
+        # noinspection PyProtectedMember
+        do_track_stats = fn_self._storage.do_log_stats
+        start_time = time.perf_counter() if do_track_stats else 0.0
+        dependencies.begin()
+        try:
+            if tracing.tracer is None:
+                value = fn(fn_self, *args, **kwargs)
+            else:
+                with tracing.span('cache.compute', {'function': fn.__qualname__, 'key': str(call_cache_key),
+                                                    'is_persisting': self._do_use_persisting_cache}):
+                    value = fn(fn_self, *args, **kwargs)
+        except BaseException:
+            dependencies.abort()
+            raise
+        dependencies.end(call_cache_key)
+        compute_time = time.perf_counter() - start_time if do_track_stats else 0.0
+
+        # noinspection PyProtectedMember
+        cached_value = self._save_to_cache(call_cache_key, value, fn_self)
+        if do_track_stats:
+            size = get_encoded_size(cached_value) if self._do_use_persisting_cache else 0
             # noinspection PyProtectedMember
-            self._save_to_cache(call_cache_key, value, fn_self)
+            fn_self._storage.stats.track_property_miss(fn.__qualname__, compute_time, size)
         return value
 
     @staticmethod
@@ -139,12 +198,17 @@ class _BaseCacheDecorator(ABC):
         track_hit_fn()
         return value, True
 
-    def _save_to_cache(self, call_cache_key: CacheKey, value: Any, fn_self: CacheDecoratable) -> None:
+    def _save_to_cache(self, call_cache_key: CacheKey, value: Any, fn_self: CacheDecoratable) -> Any:
+        """
+        :return: the value as it's cached
+        """
+
         # noinspection PyProtectedMember
         save_fn = self._get_cache_save_fn(fn_self._storage)
         if self._serializer_fn is not None and value is not None:
             value = self._serializer_fn(fn_self, value)
         save_fn(call_cache_key, value)
+        return value
 
     def _get_cache_get_fn(self, storage: PresentationStorage) -> Callable:
         if self._do_use_persisting_cache:
@@ -256,13 +320,18 @@ class _CacheDecoratorLazyHelperProperty:
 
         # noinspection PyProtectedMember
         value, _ = fn_self._storage.cacher.get_from_local_cache(value_key)
+        # noinspection PyProtectedMember
+        fn_self._storage.cacher.dependencies.note_key_read(value_key)
 
         def notify_new_value(new_value: Any) -> None:
             # noinspection PyProtectedMember
-            fn_self._storage.cacher.cache_local(value_key, new_value)
+            fn_self._storage.cacher.cache_local_handles(value_key, new_value)
+
+        # noinspection PyProtectedMember
+        compute, note_read = _make_lazy_tracking_fns(fn_self._storage, value_key)
 
         lazy = self._fn(fn_self)
-        lazy.supply_and_bind_cache(value, notify_new_value)
+        lazy.supply_and_bind_cache(value, notify_new_value, compute, note_read)
         return lazy
 
 
@@ -277,6 +346,8 @@ class _CacheDecoratorLazyListHelperProperty:
         length_key = main_key.make_son('length')
         deleted_indexes_key = main_key.make_son('deleted_indexes')
         ghost_deleted_indexes_key = main_key.make_son('ghost_deleted_indexes')
+        # noinspection PyProtectedMember
+        fn_self._storage.cacher.dependencies.note_key_read(main_key)
 
         # noinspection PyProtectedMember
         buffer, _ = fn_self._storage.cacher.get_from_local_cache(buffer_key)
@@ -292,8 +363,9 @@ class _CacheDecoratorLazyListHelperProperty:
             ghost_deleted_indexes = set(ghost_deleted_indexes)
 
         def notify_new_buffer(new_buffer: List[Any]) -> None:
+            # buffer is changed in place
             # noinspection PyProtectedMember
-            fn_self._storage.cacher.cache_local(buffer_key, new_buffer)
+            fn_self._storage.cacher.cache_local_handles(buffer_key, new_buffer)
 
         def notify_new_length(new_length: int) -> None:
             # noinspection PyProtectedMember
@@ -307,13 +379,43 @@ class _CacheDecoratorLazyListHelperProperty:
             # noinspection PyProtectedMember
             fn_self._storage.cacher.cache_local(ghost_deleted_indexes_key, list(new_ghost_deleted_indexes))
 
+        # noinspection PyProtectedMember
+        compute, note_read = _make_lazy_tracking_fns(fn_self._storage, main_key)
+
         lazy_list = self._fn(fn_self)
         lazy_list.supply_and_bind_cache(buffer, length, deleted_indexes, ghost_deleted_indexes,
                                         notify_new_buffer, notify_new_length,
-                                        notify_new_deleted_indexes, notify_new_ghost_deleted_indexes)
+                                        notify_new_deleted_indexes, notify_new_ghost_deleted_indexes,
+                                        compute, note_read)
         return lazy_list
 
 
+def _make_lazy_tracking_fns(storage: PresentationStorage,
+                            key: CacheKey) -> Tuple[Callable[[Callable[[], Any]], Any], Callable[[], None]]:
+    """
+    Handles are usually made outside of computing any cached value, so what they read is noted by their own frame,
+    and values computed from the handles depend on their key, even if the handles were made before.
+    :return: function making a handle with the given function, function noting a read of the handle
+    """
+
+    dependencies = storage.cacher.dependencies
+
+    def compute(fn: Callable[[], Any]) -> Any:
+        dependencies.begin()
+        try:
+            value = fn()
+        except BaseException:
+            dependencies.abort()
+            raise
+        dependencies.end(key)
+        return value
+
+    def note_read() -> None:
+        dependencies.note_key_read(key)
+
+    return compute, note_read
+
+
 def _make_args_key_name(args: Collection[Any] = None, kwargs: Dict[str, Any] = None) -> str:
     parts: List[str] = list()
     if args is not None and len(args) != 0:
@@ -10,25 +10,38 @@ class Lazy(ABC):
 
 
 class LazyByFunction(Lazy):
-    __slots__ = ('_fn', '_value', '_notify_new_value_fn')
+    __slots__ = ('_fn', '_value', '_notify_new_value_fn', '_compute_fn', '_note_read_fn')
 
     def __init__(self, fn: Callable[[], Any]):
         self._fn = fn
         self._value = None
         self._notify_new_value_fn = None
+        self._compute_fn: Optional[Callable[[Callable[[], Any]], Any]] = None
+        self._note_read_fn: Optional[Callable[[], None]] = None
 
     def __call__(self) -> Any:
+        if self._note_read_fn is not None:
+            self._note_read_fn()
         self._ensure_value()
         return self._value
 
-    def supply_and_bind_cache(self, value: Optional[Any], notify_new_value_fn: Callable[[], Any]):
+    def supply_and_bind_cache(self, value: Optional[Any], notify_new_value_fn: Callable[[], Any],
+                              compute_fn: Callable[[Callable[[], Any]], Any] = None,
+                              note_read_fn: Callable[[], None] = None):
+        """
+        :param compute_fn: calls the function making the value and returns its result
+        :param note_read_fn: called on every read of the value
+        """
+
         if value is not None:
             self._value = value
         self._notify_new_value_fn = notify_new_value_fn
+        self._compute_fn = compute_fn
+        self._note_read_fn = note_read_fn
 
     def _ensure_value(self):
         if self._value is None:
-            self._value = self._fn()
+            self._value = self._fn() if self._compute_fn is None else self._compute_fn(self._fn)
             self._notify_new_value()
 
     def _notify_new_value(self):
@@ -39,7 +52,8 @@ class LazyByFunction(Lazy):
 class LazyList:
     __slots__ = ('_create_fn', '_buffer', '_length', '_deleted_indexes', '_ghost_deleted_indexes',
                  '_notify_new_buffer_fn', '_notify_new_length_fn',
-                 '_notify_new_deleted_indexes_fn', '_notify_new_ghost_deleted_indexes_fn')
+                 '_notify_new_deleted_indexes_fn', '_notify_new_ghost_deleted_indexes_fn',
+                 '_compute_fn', '_note_read_fn')
 
     def __init__(self, create_fn: Callable[[], List[Any]]):
         self._create_fn = create_fn
@@ -51,6 +65,8 @@ class LazyList:
         self._notify_new_length_fn: Optional[Callable[[int], None]] = None
         self._notify_new_deleted_indexes_fn: Optional[Callable[[Set[int]], None]] = None
         self._notify_new_ghost_deleted_indexes_fn: Optional[Callable[[Set[int]], None]] = None
+        self._compute_fn: Optional[Callable[[Callable[[], List[Any]]], List[Any]]] = None
+        self._note_read_fn: Optional[Callable[[], None]] = None
 
     def __iter__(self) -> Iterator[Lazy]:
         for i in self.iter_indexes():
@@ -71,7 +87,14 @@ class LazyList:
                               notify_new_buffer_fn: Callable[[List[Any]], None],
                               notify_new_length_fn: Callable[[int], None],
                               notify_new_deleted_indexes_fn: Callable[[Set[int]], None],
-                              notify_new_ghost_deleted_indexes_fn: Callable[[Set[int]], None]) -> None:
+                              notify_new_ghost_deleted_indexes_fn: Callable[[Set[int]], None],
+                              compute_fn: Callable[[Callable[[], List[Any]]], List[Any]] = None,
+                              note_read_fn: Callable[[], None] = None) -> None:
+        """
+        :param compute_fn: calls the function creating the buffer and returns its result
+        :param note_read_fn: called on every read of the buffer or the length
+        """
+
         if buffer is not None:
             self._buffer = buffer
         if length is not None:
@@ -88,6 +111,8 @@ class LazyList:
         self._notify_new_length_fn = notify_new_length_fn
         self._notify_new_deleted_indexes_fn = notify_new_deleted_indexes_fn
         self._notify_new_ghost_deleted_indexes_fn = notify_new_ghost_deleted_indexes_fn
+        self._compute_fn = compute_fn
+        self._note_read_fn = note_read_fn
 
     def iter_indexes(self) -> Iterator[int]:
         self._ensure_length()
@@ -136,8 +161,10 @@ class LazyList:
         return self._buffer[index]
 
     def _ensure_buffer(self):
+        if self._note_read_fn is not None:
+            self._note_read_fn()
         if self._buffer is None:
-            self._buffer = self._create_fn()
+            self._buffer = self._create_fn() if self._compute_fn is None else self._compute_fn(self._create_fn)
             if len(self._deleted_indexes) != 0:
                 self._recreate_holes()
                 if self._length is not None:
@@ -149,6 +176,8 @@ class LazyList:
             self._buffer.insert(i, None)
 
     def _ensure_length(self):
+        if self._note_read_fn is not None:
+            self._note_read_fn()
         if self._length is None:
             self._ensure_buffer()
             self._length = len(self._buffer)
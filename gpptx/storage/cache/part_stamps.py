@@ -0,0 +1,243 @@
+"""
+Branches of slides, layouts and masters in the persisting cache are stamped with CRC32 of the parts their values
+are read from, so the branches of changed parts are dropped when the cache is loaded for another version of the file.
+The rest of the cache is stamped with the parts of the presentation itself.
+Stamp is a list: the part of the branch, then pairs of the part and its CRC32, -1 for a missing part.
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from gpptx.pptx_tools.paths import PRESENTATION_PATH, SLIDE_LAYOUTS_PATH_PREFIX, SLIDE_MASTERS_PATH_PREFIX, \
+    THEMES_PATH_PREFIX, make_rels_path, find_slide_paths
+from gpptx.pptx_tools.rels import find_first_relation_path_with_prefix
+from gpptx.storage.cache.cacher import Cacher, CacheKey
+from gpptx.storage.pptx.loader import Loader
+
+STAMP_NAME = '__parts__'
+
+_ROOT_NAME = ''
+_SLIDES_NAME = 'slides'
+_SLIDE_LAYOUTS_NAME = 'slide_layout'
+_SLIDE_MASTERS_NAME = 'slide_master'
+_PART_BRANCH_NAMES = (_SLIDES_NAME, _SLIDE_LAYOUTS_NAME, _SLIDE_MASTERS_NAME)
+_NO_CRC = -1
+
+
+def stamp_persisting_cache(loader: Loader, cache: Dict[str, Any]) -> None:
+    """
+    Stamps the dumped cache by the current contents of the loader, the same as they will be in a saved file.
+    Branches of slides which don't exist anymore are removed from it.
+    """
+
+    root = cache.get(_ROOT_NAME)
+    if not isinstance(root, dict):
+        return
+
+    crcs: Dict[str, int] = dict()  # chains of slides share their layouts, masters and themes
+    root[STAMP_NAME] = _make_stamp(loader, crcs, _make_presentation_chain())
+
+    slide_branches = root.get(_SLIDES_NAME)
+    if isinstance(slide_branches, dict):
+        slide_paths = find_slide_paths(loader)
+        for name in list(slide_branches.keys()):
+            branch = slide_branches[name]
+            if not name.isdigit() or not isinstance(branch, dict):
+                continue  # not a slide, belongs to the presentation
+            slide_path = _get_slide_path(slide_paths, name)
+            if slide_path is None:
+                del slide_branches[name]
+            else:
+                branch[STAMP_NAME] = _make_stamp(loader, crcs, _make_slide_chain(loader, slide_path))
+
+    for branches_name, make_chain in ((_SLIDE_LAYOUTS_NAME, _make_slide_layout_chain),
+                                      (_SLIDE_MASTERS_NAME, _make_slide_master_chain)):
+        branches = root.get(branches_name)
+        if isinstance(branches, dict):
+            for path, branch in branches.items():
+                if isinstance(branch, dict):
+                    branch[STAMP_NAME] = _make_stamp(loader, crcs, make_chain(loader, path))
+
+
+def drop_stale_persisting_cache(loader: Loader, cacher: Cacher) -> None:
+    """
+    Deletes the branches whose parts have changed since they were stamped.
+    Cache without stamps is left as is.
+    """
+
+    root_key = CacheKey(_ROOT_NAME)
+    root_stamp, is_found = cacher.get_from_persisting_cache(root_key.make_son(STAMP_NAME))
+    if not is_found:
+        return
+    crcs: Dict[str, int] = dict()  # chains of slides share their layouts, masters and themes
+    is_root_valid = _is_stamp_valid(loader, crcs, root_stamp, PRESENTATION_PATH)
+
+    slide_paths = find_slide_paths(loader)
+    for branches_name in _PART_BRANCH_NAMES:
+        branches_key = root_key.make_son(branches_name)
+        for name in cacher.get_son_names_in_persisting_cache(branches_key):
+            key = branches_key.make_son(name)
+            if branches_name == _SLIDES_NAME:
+                if not name.isdigit():
+                    if not is_root_valid:
+                        cacher.delete_from_persisting_cache(key)
+                    continue  # not a slide, belongs to the presentation
+                part_path = _get_slide_path(slide_paths, name)
+            else:
+                part_path = name
+
+            stamp, is_found = cacher.get_from_persisting_cache(key.make_son(STAMP_NAME))
+            if part_path is None or not is_found or not _is_stamp_valid(loader, crcs, stamp, part_path):
+                cacher.delete_from_persisting_cache(key)
+
+    if not is_root_valid:
+        for name in cacher.get_son_names_in_persisting_cache(root_key):
+            if name not in _PART_BRANCH_NAMES:
+                cacher.delete_from_persisting_cache(root_key.make_son(name))
+
+
+def map_untracked_persisting_cache(loader: Loader, cacher: Cacher) -> None:
+    """
+    Maps the branches of the cache by the parts their stamps have, so that the branches based on a changed part
+    are found without making the chains again. The stamps are used when they are there, e.g. in a loaded cache.
+    Slides are mapped by their parts, not by their indexes, since indexes shift when slides are deleted.
+    """
+
+    branches_by_part: Dict[str, Set[Tuple[str, str]]] = dict()
+
+    def add(chain: List[str], branch: Tuple[str, str]) -> None:
+        for path in chain:
+            branches = branches_by_part.get(path)
+            if branches is None:
+                branches_by_part[path] = {branch}
+            else:
+                branches.add(branch)
+
+    root_key = CacheKey(_ROOT_NAME)
+    add(_make_presentation_chain(), (_ROOT_NAME, PRESENTATION_PATH))
+
+    slide_paths = find_slide_paths(loader)
+    for branches_name in _PART_BRANCH_NAMES:
+        branches_key = root_key.make_son(branches_name)
+        for name in cacher.get_son_names_in_persisting_cache(branches_key):
+            if branches_name == _SLIDES_NAME:
+                part_path = _get_slide_path(slide_paths, name)
+                if part_path is None:
+                    continue  # not a slide, belongs to the presentation
+            else:
+                part_path = name
+
+            stamp, is_found = cacher.get_from_persisting_cache(branches_key.make_son(name).make_son(STAMP_NAME))
+            if is_found and isinstance(stamp, list) and len(stamp) > 0 and stamp[0] == part_path:
+                chain = stamp[1::2]
+            else:
+                chain = _MAKE_CHAIN_FNS[branches_name](loader, part_path)
+            add(chain, (branches_name, part_path))
+
+    cacher.untracked_branches_by_part = branches_by_part
+
+
+def drop_persisting_cache_based_on_part(loader: Loader, cacher: Cacher, filepath: str) -> None:
+    """
+    Deletes the branches whose stamps have the changed part, the same as they are dropped when they are stale.
+    Values loaded from a dumped cache have no recorded dependencies, so they are invalidated this way.
+    The cache must be mapped by map_untracked_persisting_cache().
+    """
+
+    branches = cacher.untracked_branches_by_part.get(filepath)
+    if branches is None:
+        return
+
+    root_key = CacheKey(_ROOT_NAME)
+    slide_paths = None
+    for branches_name, part_path in branches:
+        if branches_name == _ROOT_NAME:
+            for name in list(cacher.get_son_names_in_persisting_cache(root_key)):
+                if name not in _PART_BRANCH_NAMES:
+                    cacher.delete_from_any_cache(root_key.make_son(name))
+            slides_key = root_key.make_son(_SLIDES_NAME)
+            for name in list(cacher.get_son_names_in_persisting_cache(slides_key)):
+                if not name.isdigit():  # not a slide, belongs to the presentation
+                    cacher.delete_from_any_cache(slides_key.make_son(name))
+        elif branches_name == _SLIDES_NAME:
+            if slide_paths is None:
+                slide_paths = find_slide_paths(loader)
+            if part_path in slide_paths:
+                slide_name = str(slide_paths.index(part_path))
+                cacher.delete_from_any_cache(root_key.make_son(_SLIDES_NAME).make_son(slide_name))
+        else:
+            cacher.delete_from_any_cache(root_key.make_son(branches_name).make_son(part_path))
+
+
+def _get_slide_path(slide_paths: List[str], name: str) -> Optional[str]:
+    if not name.isdigit():
+        return None
+    index = int(name)
+    return slide_paths[index] if index < len(slide_paths) else None
+
+
+def _make_stamp(loader: Loader, crcs: Dict[str, int], chain: List[str]) -> List[Any]:
+    stamp = [chain[0]]
+    for path in chain:
+        stamp.append(path)
+        stamp.append(_get_crc(loader, crcs, path))
+    return stamp
+
+
+def _is_stamp_valid(loader: Loader, crcs: Dict[str, int], stamp: Any, part_path: str) -> bool:
+    if not isinstance(stamp, list) or len(stamp) % 2 != 1 or stamp[0] != part_path:
+        return False
+    for i in range(1, len(stamp), 2):
+        if _get_crc(loader, crcs, stamp[i]) != stamp[i + 1]:
+            return False
+    return True
+
+
+def _get_crc(loader: Loader, crcs: Dict[str, int], path: str) -> int:
+    """
+    CRC32 of a changed part is computed by serializing it, so they are memoized in crcs for one pass.
+    """
+
+    crc = crcs.get(path)
+    if crc is None:
+        crc = loader.get_file_crc(path)
+        if crc is None:
+            crc = _NO_CRC
+        crcs[path] = crc
+    return crc
+
+
+def _make_presentation_chain() -> List[str]:
+    return [PRESENTATION_PATH, make_rels_path(PRESENTATION_PATH)]
+
+
+def _make_slide_chain(loader: Loader, slide_path: str) -> List[str]:
+    return _make_chain(loader, slide_path, SLIDE_LAYOUTS_PATH_PREFIX, _make_slide_layout_chain)
+
+
+def _make_slide_layout_chain(loader: Loader, slide_layout_path: str) -> List[str]:
+    return _make_chain(loader, slide_layout_path, SLIDE_MASTERS_PATH_PREFIX, _make_slide_master_chain)
+
+
+def _make_slide_master_chain(loader: Loader, slide_master_path: str) -> List[str]:
+    return _make_chain(loader, slide_master_path, THEMES_PATH_PREFIX, lambda _, theme_path: [theme_path])
+
+
+def _make_chain(loader: Loader, path: str, related_prefix: str, make_related_chain) -> List[str]:
+    """
+    :return: the part, its rels and the chain of the part it's based on, e.g. a slide, its layout, master and theme
+    """
+
+    rels_path = make_rels_path(path)
+    chain = [path, rels_path]
+    if loader.does_file_exist(rels_path):
+        related_path = find_first_relation_path_with_prefix(loader, rels_path, related_prefix)
+        if related_path is not None:
+            chain.extend(make_related_chain(loader, related_path))
+    return chain
+
+
+_MAKE_CHAIN_FNS = {
+    _SLIDES_NAME: _make_slide_chain,
+    _SLIDE_LAYOUTS_NAME: _make_slide_layout_chain,
+    _SLIDE_MASTERS_NAME: _make_slide_master_chain,
+}
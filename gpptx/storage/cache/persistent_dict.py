@@ -0,0 +1,114 @@
+from typing import Any, Callable, Dict, Iterator, Tuple, Optional
+
+_MISSING = object()
+_DELETED = object()
+_MAX_LAYERS = 8
+
+
+class PersistentDict:
+    """
+    Dict with O(1) duplicate(). Duplicating freezes the entries written so far into a layer shared by both dicts,
+    each of them writes only to its own top layer after that, and lookups fall through the layers from the top.
+    Entries of the shared layers are deleted by shadowing them in the top layer.
+    Layers are merged into one when there are too many of them.
+    Values are never copied, mutable ones must be changed through get_for_update().
+    """
+
+    __slots__ = ('_top', '_layers', '_copy_value_fn')
+
+    def __init__(self, entries: Dict[Any, Any] = None, copy_value_fn: Optional[Callable[[Any], Any]] = None):
+        """
+        :param entries: taken as the top layer, not copied
+        :param copy_value_fn: makes own copy of a mutable value from a shared layer, see get_for_update()
+        """
+
+        self._top: Dict[Any, Any] = entries if entries is not None else dict()
+        self._layers: Tuple[Dict[Any, Any], ...] = ()
+        self._copy_value_fn = copy_value_fn
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = self._top.get(key, _MISSING)
+        if value is _MISSING:
+            if len(self._layers) == 0:
+                return default
+            value = self._get_from_layers(key)
+            if value is _MISSING:
+                return default
+        if value is _DELETED:
+            return default
+        return value
+
+    def get_for_update(self, key: Any, default: Any = None) -> Any:
+        """
+        Same as get(), but a value from a shared layer is copied to the top layer first, so it can be changed in place.
+        """
+
+        value = self._top.get(key, _MISSING)
+        if value is _MISSING and len(self._layers) > 0:
+            value = self._get_from_layers(key)
+            if value is not _MISSING and value is not _DELETED:
+                value = self._copy_value_fn(value)
+                self._top[key] = value
+        if value is _MISSING or value is _DELETED:
+            return default
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._top[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        if len(self._layers) == 0:
+            value = self._top.pop(key, _MISSING)
+        else:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self._top[key] = _DELETED
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return value
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        if len(self._layers) == 0:
+            entries = self._top
+        else:
+            entries = dict()
+            for layer in self._layers:
+                entries.update(layer)
+            entries.update(self._top)
+        return ((k, v) for k, v in entries.items() if v is not _DELETED)
+
+    def values(self) -> Iterator[Any]:
+        return (v for _, v in self.items())
+
+    def duplicate(self):
+        if len(self._top) > 0:
+            self._layers = self._layers + (self._top,)
+            self._top = dict()
+            if len(self._layers) > _MAX_LAYERS:
+                self._layers = (dict(self.items()),)
+
+        new_dict = PersistentDict(copy_value_fn=self._copy_value_fn)
+        new_dict._layers = self._layers
+        return new_dict
+
+    def _get_from_layers(self, key: Any) -> Any:
+        for layer in reversed(self._layers):
+            value = layer.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return _MISSING
@@ -1,9 +1,74 @@
+from bisect import bisect_left
+from typing import Dict, Any, List
+
+COMPUTE_TIME_BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)  # upper bounds in seconds, the last bucket is unbounded
+
+
+class PropertyStats:
+    """
+    Compute time of a value includes the time of the cached values computed while computing it.
+    Size is the size of the values put to persisting cache, as they are stored in a cache file.
+    """
+
+    __slots__ = ('_hits', '_misses', '_compute_time', '_compute_time_histogram', '_size')
+
+    def __init__(self):
+        self._hits = 0
+        self._misses = 0
+        self._compute_time = 0.0
+        self._compute_time_histogram = [0] * (len(COMPUTE_TIME_BUCKETS) + 1)
+        self._size = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def compute_time(self) -> float:
+        return self._compute_time
+
+    @property
+    def compute_time_histogram(self) -> List[int]:
+        """
+        :return: counts of the computations by COMPUTE_TIME_BUCKETS
+        """
+
+        return list(self._compute_time_histogram)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def track_hit(self) -> None:
+        self._hits += 1
+
+    def track_miss(self, compute_time: float, size: int) -> None:
+        self._misses += 1
+        self._compute_time += compute_time
+        self._compute_time_histogram[bisect_left(COMPUTE_TIME_BUCKETS, compute_time)] += 1
+        self._size += size
+
+    def make_report(self) -> Dict[str, Any]:
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'compute_time': self._compute_time,
+            'compute_time_histogram': list(self._compute_time_histogram),
+            'size': self._size,
+        }
+
+
 class Stats:
     def __init__(self):
         self._persisting_cache_hits = 0
         self._persisting_cache_misses = 0
         self._local_cache_hits = 0
         self._local_cache_misses = 0
+        self._property_stats: Dict[str, PropertyStats] = dict()
 
     @property
     def persisting_cache_hits(self) -> int:
@@ -21,6 +86,14 @@ class Stats:
     def local_cache_misses(self) -> int:
         return self._local_cache_misses
 
+    @property
+    def property_stats(self) -> Dict[str, PropertyStats]:
+        """
+        :return: stats by qualified names of the decorated functions, e.g. Run.font_size
+        """
+
+        return self._property_stats
+
     def track_persisting_cache_hit(self) -> None:
         self._persisting_cache_hits += 1
 
@@ -32,3 +105,30 @@ class Stats:
 
     def track_local_cache_miss(self) -> None:
         self._local_cache_misses += 1
+
+    def track_property_hit(self, name: str) -> None:
+        self._get_property_stats(name).track_hit()
+
+    def track_property_miss(self, name: str, compute_time: float, size: int) -> None:
+        self._get_property_stats(name).track_miss(compute_time, size)
+
+    def make_report(self) -> Dict[str, Any]:
+        """
+        :return: plain data, which can be dumped to json
+        """
+
+        return {
+            'persisting_cache_hits': self._persisting_cache_hits,
+            'persisting_cache_misses': self._persisting_cache_misses,
+            'local_cache_hits': self._local_cache_hits,
+            'local_cache_misses': self._local_cache_misses,
+            'compute_time_buckets': list(COMPUTE_TIME_BUCKETS),
+            'properties': {name: stats.make_report() for name, stats in sorted(self._property_stats.items())},
+        }
+
+    def _get_property_stats(self, name: str) -> PropertyStats:
+        stats = self._property_stats.get(name)
+        if stats is None:
+            stats = PropertyStats()
+            self._property_stats[name] = stats
+        return stats
@@ -0,0 +1,98 @@
+import os
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from gpptx.storage.cache.cache_file import dump_cache_file
+
+_CACHE_FILE_EXT = '.gpptxc'
+_FINGERPRINT_REGEX = re.compile(r'^[0-9a-f]{16,128}$')
+_STALE_TMP_FILE_AGE = 60 * 60
+
+
+class CacheStore:
+    """
+    Directory of persisting cache files named by fingerprints of the pptx they belong to, see Loader.get_fingerprint().
+    Files are written atomically, so several processes can share the directory.
+    Least recently used files are removed when the directory gets bigger than max_size bytes.
+    """
+
+    def __init__(self, directory: str, max_size: Optional[int] = None):
+        self._directory = directory
+        self._max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def max_size(self) -> Optional[int]:
+        return self._max_size
+
+    def get_cache_file(self, fingerprint: str) -> Optional[str]:
+        """
+        :return: path of the cache file, if there is one, it's marked as recently used
+        """
+
+        path = self._make_path(fingerprint)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put_cache(self, fingerprint: str, cache: Dict[str, Any]) -> None:
+        dump_cache_file(cache, self._make_path(fingerprint))
+        if self._max_size is not None:
+            self.evict(self._max_size)
+
+    def remove(self, fingerprint: str) -> None:
+        try:
+            os.remove(self._make_path(fingerprint))
+        except FileNotFoundError:
+            pass
+
+    def get_size(self) -> int:
+        return sum(size for _, _, size in self._list_cache_files())
+
+    def evict(self, max_size: int) -> None:
+        """
+        Removes least recently used files until the rest fit into max_size, the most recent one is always kept.
+        Files removed by another process meanwhile are skipped.
+        """
+
+        cache_files = sorted(self._list_cache_files(), key=lambda it: it[1], reverse=True)
+        total_size = 0
+        for i, (path, _, size) in enumerate(cache_files):
+            total_size += size
+            if i > 0 and total_size > max_size:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _make_path(self, fingerprint: str) -> str:
+        if _FINGERPRINT_REGEX.match(fingerprint) is None:
+            raise ValueError(f'Bad fingerprint {fingerprint!r}')
+        return os.path.join(self._directory, fingerprint + _CACHE_FILE_EXT)
+
+    def _list_cache_files(self) -> List[Tuple[str, int, int]]:
+        """
+        :return: paths with their mtime_ns and size, tmp files left by killed writers are removed on the way
+        """
+
+        cache_files = list()
+        now_ns = time.time_ns() if hasattr(time, 'time_ns') else int(time.time() * 1e9)
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith(_CACHE_FILE_EXT):
+                        stat = entry.stat()
+                        cache_files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+                    elif entry.name.startswith('.') and entry.name.endswith('.tmp'):
+                        if now_ns - entry.stat().st_mtime_ns > _STALE_TMP_FILE_AGE * 10 ** 9:
+                            os.remove(entry.path)
+                except OSError:
+                    pass
+        return cache_files
@@ -0,0 +1,70 @@
+import zlib
+from enum import Enum
+from typing import Dict, Tuple
+from zipfile import ZIP_STORED, ZIP_DEFLATED
+
+from gpptx.storage.pptx.zip_tools import CompressedMember, compress_member
+
+
+class Compression(Enum):
+    STORE = 1
+    FAST_DEFLATE = 2
+    DEFLATE = 3
+    MAX_DEFLATE = 4
+
+
+_COMPRESSION_PARAMS: Dict[Compression, Tuple[int, int]] = {
+    Compression.STORE: (ZIP_STORED, 0),
+    Compression.FAST_DEFLATE: (ZIP_DEFLATED, zlib.Z_BEST_SPEED),
+    Compression.DEFLATE: (ZIP_DEFLATED, zlib.Z_DEFAULT_COMPRESSION),
+    Compression.MAX_DEFLATE: (ZIP_DEFLATED, zlib.Z_BEST_COMPRESSION),
+}
+
+ALREADY_COMPRESSED_EXTENSIONS = ('png', 'jpg', 'jpeg', 'jpe', 'gif', 'tif', 'tiff', 'webp',
+                                 'mp3', 'm4a', 'wma', 'mp4', 'm4v', 'mov', 'wmv', 'avi', 'mpg', 'mpeg',
+                                 'xlsx', 'xlsm', 'docx', 'pptx', 'zip')
+
+
+class CompressionPolicy:
+    """
+    Chooses compression of the saved members by the longest matching path prefix first, then by extension.
+    """
+
+    def __init__(self, default_compression: Compression = Compression.DEFLATE,
+                 compression_by_extension: Dict[str, Compression] = None,
+                 compression_by_prefix: Dict[str, Compression] = None):
+        self._default_compression = default_compression
+        self._compression_by_extension = {k.lower(): v for k, v in (compression_by_extension or dict()).items()}
+        # longest prefixes go first, so that the first match is the most specific one
+        self._compression_by_prefix = sorted((compression_by_prefix or dict()).items(),
+                                             key=lambda it: len(it[0]), reverse=True)
+
+    def choose(self, filepath: str) -> Compression:
+        for prefix, compression in self._compression_by_prefix:
+            if filepath.startswith(prefix):
+                return compression
+
+        _, dot, ext = filepath.rpartition('.')
+        if dot:
+            compression = self._compression_by_extension.get(ext.lower())
+            if compression is not None:
+                return compression
+
+        return self._default_compression
+
+    def compress(self, filepath: str, contents: bytes) -> CompressedMember:
+        compress_type, compress_level = _COMPRESSION_PARAMS[self.choose(filepath)]
+        return compress_member(contents, compress_type=compress_type, compress_level=compress_level)
+
+
+DEFAULT_COMPRESSION_POLICY = CompressionPolicy()
+
+FAST_COMPRESSION_POLICY = CompressionPolicy(
+    default_compression=Compression.FAST_DEFLATE,
+    compression_by_extension={ext: Compression.STORE for ext in ALREADY_COMPRESSED_EXTENSIONS}
+)
+
+SMALLEST_COMPRESSION_POLICY = CompressionPolicy(
+    default_compression=Compression.MAX_DEFLATE,
+    compression_by_extension={ext: Compression.STORE for ext in ALREADY_COMPRESSED_EXTENSIONS}
+)
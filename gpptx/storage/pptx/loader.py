@@ -1,128 +1,624 @@
 import copy
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Executor, CancelledError, Future
 from io import BytesIO
-from typing import Dict, Set, BinaryIO, Union, Iterable
+from typing import Dict, Set, BinaryIO, Union, Iterable, Optional, Iterator, Callable, List, Tuple, Any
 from zipfile import ZipFile
 
 from lxml import etree
 from lxml.etree import ElementTree
 
+from gpptx.storage.pptx.mapped_file import MappedFile
+from gpptx.storage.pptx.part_index import PartIndex
+from gpptx.storage.pptx.compression import CompressionPolicy, DEFAULT_COMPRESSION_POLICY
+from gpptx.storage.pptx.xml_parser import XmlParserOptions, ThreadLocalXmlParser
+from gpptx.storage.pptx.zip_tools import iter_copy_raw_member, write_compressed_member, remove_members, \
+    ChunkBuffer, make_zip_fingerprint
+from gpptx.util import tracing
+from gpptx.util.aio import run_in_executor, run_cancellable_in_executor
+
+
+_XML_EXTS = ('.xml', '.rels')
+
 
 class Loader:
-    def __init__(self):
+    def __init__(self, xml_parser_options: XmlParserOptions = None, xml_cache_budget: Optional[int] = None):
+        """
+        :param xml_cache_budget: max total size in bytes of the source xml of unchanged parsed parts kept in memory.
+        Least recently used ones are evicted and parsed again on demand. Changed parts are never evicted,
+        neither are the pinned ones, so the budget is exceeded while nodes of more parts than it fits are alive.
+        """
+
         self._zip: ZipFile = None
+        # loaders sharing the zip, the last one closes it when it loads another source
+        self._zip_users: weakref.WeakSet = weakref.WeakSet()
+        self._xml_parser = ThreadLocalXmlParser(xml_parser_options)
 
-        self._all_files: Set[str] = None
+        self._part_index = PartIndex()
         self._deleted_files: Set[str] = set()
 
-        self._xml_cache: Dict[str, ElementTree] = dict()
+        self._xml_cache: Dict[str, ElementTree] = OrderedDict()
+        self._xml_cache_sizes: Dict[str, int] = dict()
+        self._xml_cache_size = 0
+        self._xml_cache_budget = xml_cache_budget
+        self._xml_cache_lock = threading.Lock()
+        self._xml_parses: Dict[str, Future] = dict()
+        self._pinned_xml_counts: Dict[str, int] = dict()
+        self._xml_eviction_listeners: List[Callable[[str], None]] = list()
+        self._file_read_listeners: List[Callable[[str], None]] = list()
+        self._file_change_listeners: List[Callable[[str], None]] = list()
         self._changed_files_cache: Dict[str, bytes] = dict()
         self._changed_xml_cache: Dict[str, ElementTree] = dict()
 
+        self._is_frozen = False
+        self._frozen_lock = threading.Lock()
+        self._base: Optional[Loader] = None
+
     def load(self, src: Union[BinaryIO, BytesIO]) -> None:
+        if self._zip is not None:
+            self._release_zip()
         self._zip = ZipFile(src, mode='r')
-        self._all_files = set(self._zip.namelist())
+        self._zip_users = weakref.WeakSet([self])
+        self._part_index = PartIndex(self._zip.namelist())
+
+    def load_path(self, path: str) -> None:
+        self.load(MappedFile(path))
+
+    def save(self, dest: Union[BinaryIO, BytesIO], do_copy_unchanged_raw: bool = True,
+             workers: Optional[int] = None, compression_policy: CompressionPolicy = None,
+             cancel_event: threading.Event = None) -> str:
+        """
+        :param cancel_event: when it's set, saving stops with CancelledError before the next member
+        :return: fingerprint of the saved zip, see get_fingerprint()
+        """
+
+        if compression_policy is None:
+            compression_policy = DEFAULT_COMPRESSION_POLICY
+
+        with tracing.span('loader.save', {'workers': workers}), \
+                ThreadPoolExecutor(max_workers=workers) as executor, ZipFile(dest, mode='w') as new_zip:
+            self._check_cancelled(cancel_event)
+            for _ in self._iter_write_members(new_zip, executor, do_copy_unchanged_raw, compression_policy):
+                self._check_cancelled(cancel_event)
+        return make_zip_fingerprint(new_zip.infolist())
+
+    def iter_save(self, chunk_size: int = 64 * 1024, do_copy_unchanged_raw: bool = True,
+                  workers: Optional[int] = None, compression_policy: CompressionPolicy = None) -> Iterator[bytes]:
+        """
+        Saves to a generator of zip chunks, nothing is sought back, so they can be streamed as they come.
+        All the chunks are chunk_size long, except the last one.
+        The generator returns the fingerprint of the saved zip, see get_fingerprint().
+        """
+
+        if compression_policy is None:
+            compression_policy = DEFAULT_COMPRESSION_POLICY
+
+        buffer = ChunkBuffer()
+        with tracing.span('loader.iter_save', {'workers': workers}), \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            with ZipFile(buffer, mode='w') as new_zip:
+                for _ in self._iter_write_members(new_zip, executor, do_copy_unchanged_raw, compression_policy):
+                    yield from buffer.pop_chunks(chunk_size)
+            yield from buffer.pop_chunks(chunk_size, do_pop_rest=True)
+        return make_zip_fingerprint(new_zip.infolist())
+
+    async def asave(self, dest: Union[BinaryIO, BytesIO], do_copy_unchanged_raw: bool = True,
+                    workers: Optional[int] = None, compression_policy: CompressionPolicy = None,
+                    executor: Executor = None) -> str:
+        return await run_cancellable_in_executor(executor, lambda cancel_event: self.save(
+            dest, do_copy_unchanged_raw=do_copy_unchanged_raw, workers=workers,
+            compression_policy=compression_policy, cancel_event=cancel_event))
+
+    def save_in_place(self, workers: Optional[int] = None, compression_policy: CompressionPolicy = None) -> None:
+        """
+        Appends changed files to the source file and rewrites its central directory, so that old versions of them
+        become dead space. Use compact() to reclaim it.
+        """
+
+        if compression_policy is None:
+            compression_policy = DEFAULT_COMPRESSION_POLICY
+
+        src_path = self._get_src_path()
+        changed_filepaths = list(self._iter_changed_filepaths())
+        replaced_filepaths = set(changed_filepaths) | self._deleted_files
+
+        with tracing.span('loader.save_in_place', {'path': src_path, 'changed_files': len(changed_filepaths)}), \
+                ThreadPoolExecutor(max_workers=workers) as executor, ZipFile(src_path, mode='a') as zip_file:
+            remove_members(zip_file, replaced_filepaths)
+
+            compressed_members = executor.map(lambda it: compression_policy.compress(it, self.get_file(it)),
+                                              changed_filepaths)
+            for path, member in zip(changed_filepaths, compressed_members):
+                write_compressed_member(zip_file, path, member)
+
+        self._reload_saved_src(src_path)
+
+    def compact(self, compression_policy: CompressionPolicy = None) -> None:
+        """
+        Rewrites the source file with all the changes and without dead space left by save_in_place().
+        """
+
+        src_path = self._get_src_path()
+        src_dir, src_name = os.path.split(os.path.abspath(src_path))
+
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{src_name}.', suffix='.tmp', dir=src_dir)
+        try:
+            with tracing.span('loader.compact', {'path': src_path}), os.fdopen(fd, mode='wb') as f:
+                self.save(f, compression_policy=compression_policy)
+            shutil.copymode(src_path, tmp_path)  # mkstemp() makes the file readable by the owner only
+            os.replace(tmp_path, src_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._reload_saved_src(src_path)
 
-    def save(self, dest: Union[BinaryIO, BytesIO]) -> None:
-        with ZipFile(dest, mode='w') as new_zip:
-            processed_files = set()
+    def duplicate(self):
+        new_loader = Loader(self._xml_parser.options, self._xml_cache_budget)
 
-            processed_files.update(self._deleted_files)  # skip deleted files
+        new_loader._zip = self._zip
+        new_loader._zip_users = self._zip_users
+        self._zip_users.add(new_loader)
 
-            for path, tree in self._changed_xml_cache.items():
-                if path in processed_files:
-                    continue
-                new_zip.writestr(path, self._stringify_xml(tree))
-                processed_files.add(path)
+        new_loader._part_index = self._part_index.duplicate()
+        new_loader._deleted_files = set(self._deleted_files)
 
-            for path, blob in self._changed_files_cache.items():
-                if path in processed_files:
-                    continue
-                new_zip.writestr(path, blob)
-                processed_files.add(path)
+        # trees are changed in place before they are saved, so they can't be shared between loaders.
+        # Unchanged parts are shared through the zip and parsed on demand, changed blobs are immutable,
+        # so only the changed trees are cloned
+        new_loader._changed_files_cache = dict(self._changed_files_cache)
+        new_loader._changed_xml_cache = {path: copy.deepcopy(tree) for path, tree in self._changed_xml_cache.items()}
 
-            for path in self._all_files:
-                if path in processed_files:
-                    continue
-                new_zip.writestr(path, self._zip.read(path))
+        new_loader._base = self._base
 
-    def duplicate(self):
-        new_loader = Loader()
+        return new_loader
+
+    def dump_snapshot(self, do_embed_source: bool = False) -> Dict[str, Any]:
+        """
+        :param do_embed_source: embed the source zip even if it's a file which can be referred by path.
+        A referred file must stay unchanged until the snapshot is loaded.
+        """
+
+        src_path = self._zip.filename if self._zip is not None else None
+        if src_path is not None and not os.path.isfile(src_path):
+            src_path = None
+
+        src = None
+        src_stat = None
+        if self._zip is not None and (do_embed_source or src_path is None):
+            src_path = None
+            # noinspection PyProtectedMember
+            with self._zip._lock:
+                self._zip.fp.seek(0)
+                src = self._zip.fp.read()
+        elif src_path is not None:
+            src_path = os.path.abspath(src_path)
+            src_stat = self._make_src_stat(src_path)
+
+        # changed trees are restored as blobs and parsed on demand
+        changed_files = dict(self._changed_files_cache)
+        for path, tree in self._changed_xml_cache.items():
+            changed_files[path] = self._stringify_xml(tree)
+
+        options = self._xml_parser.options
+        return {
+            'src_path': src_path,
+            'src_stat': src_stat,
+            'src': src,
+            'xml_parser_options': (options.huge_tree, options.remove_blank_text, options.resolve_entities),
+            'xml_cache_budget': self._xml_cache_budget,
+            'changed_files': changed_files,
+            'deleted_files': list(self._deleted_files),
+            'filelist': list(self._part_index.paths),
+        }
 
+    @staticmethod
+    def load_snapshot(snapshot: Dict[str, Any]):
+        loader = Loader(XmlParserOptions(*snapshot['xml_parser_options']), snapshot['xml_cache_budget'])
+
+        src_path = snapshot['src_path']
+        if src_path is not None:
+            if not os.path.isfile(src_path) or Loader._make_src_stat(src_path) != tuple(snapshot['src_stat']):
+                raise ValueError(f'Source file {src_path} of the snapshot has changed')
+            loader.load_path(src_path)
+        elif snapshot['src'] is not None:
+            loader.load(BytesIO(snapshot['src']))
+
+        loader._changed_files_cache = dict(snapshot['changed_files'])
+        loader._deleted_files = set(snapshot['deleted_files'])
+        loader._part_index = PartIndex(snapshot['filelist'])
+        return loader
+
+    def freeze(self, workers: Optional[int] = None) -> None:
+        """
+        Parses all the xml files and forbids changing them, so the loader can serve as a base of overlays.
+        """
+
+        self.preload((path for path in self._part_index.paths if path.endswith(_XML_EXTS)), workers=workers)
+        self._is_frozen = True
+
+    def make_overlay(self, xml_cache_budget: Optional[int] = None):
+        """
+        Makes a loader over this frozen one, sharing its source zip.
+        Trees are changed in place before they are saved, so the base trees are never given out,
+        the overlay gets its own copies of the ones it reads, which is still cheaper than parsing.
+        The copies of unchanged parts are kept within xml_cache_budget like parsed ones and copied again when evicted.
+        """
+
+        if not self._is_frozen:
+            raise ValueError('Only a frozen loader can be a base of overlays')
+
+        new_loader = Loader(self._xml_parser.options, xml_cache_budget)
         new_loader._zip = self._zip
+        new_loader._zip_users = self._zip_users
+        self._zip_users.add(new_loader)
+        new_loader._part_index = self._part_index.duplicate()
+        new_loader._base = self
+        return new_loader
 
-        new_loader._all_files = self._all_files
-        new_loader._deleted_files = copy.deepcopy(self._deleted_files)
+    def get_fingerprint(self) -> str:
+        """
+        :return: fingerprint of the source zip, the same for the same contents of the members
+        """
 
-        new_loader._xml_cache = copy.deepcopy(self._xml_cache)
-        new_loader._changed_files_cache = copy.deepcopy(self._changed_files_cache)
-        new_loader._changed_xml_cache = copy.deepcopy(self._changed_xml_cache)
+        return make_zip_fingerprint(self._zip.infolist())
 
-        return new_loader
+    @property
+    def xml_cache_budget(self) -> Optional[int]:
+        return self._xml_cache_budget
+
+    @property
+    def part_index(self) -> PartIndex:
+        """
+        Index of the existing files, including the saved and excluding the deleted ones. It must not be changed outside.
+        """
+
+        return self._part_index
+
+    def has_changes(self) -> bool:
+        return len(self._deleted_files) > 0 or len(self._changed_xml_cache) > 0 or len(self._changed_files_cache) > 0
 
     def get_filelist(self) -> Iterable[str]:
-        return self._all_files - self._deleted_files
+        return set(self._part_index.paths)
 
     def does_file_exist(self, filepath: str) -> bool:
-        return filepath not in self._deleted_files and filepath in self._all_files
+        return self._part_index.has(filepath)
 
     def get_file(self, filepath: str) -> bytes:
+        for listener in self._file_read_listeners:
+            listener(filepath)
+
         if filepath in self._changed_files_cache:
             return self._changed_files_cache[filepath]
 
         if filepath in self._changed_xml_cache:
-            return self._stringify_xml(filepath)
+            return self._stringify_xml(self._changed_xml_cache[filepath])
 
         return self._zip.read(filepath)
 
+    def get_file_crc(self, filepath: str) -> Optional[int]:
+        """
+        :return: CRC32 of the contents, the same as it will be in a saved zip, None if there is no such file
+        """
+
+        if not self._part_index.has(filepath):
+            return None
+        if filepath in self._changed_files_cache or filepath in self._changed_xml_cache:
+            return zlib.crc32(self.get_file(filepath))
+        return self._zip.getinfo(filepath).CRC
+
+    async def aget_file(self, filepath: str, executor: Executor = None) -> bytes:
+        return await run_in_executor(executor, self.get_file, filepath)
+
     def get_file_str(self, filepath: str) -> str:
         return self.get_file(filepath).decode('utf-8')
 
+    async def aget_file_str(self, filepath: str, executor: Executor = None) -> str:
+        return await run_in_executor(executor, self.get_file_str, filepath)
+
     def get_file_xml(self, filepath: str) -> ElementTree:
+        for listener in self._file_read_listeners:
+            listener(filepath)
+
         if filepath in self._changed_xml_cache:
             return self._changed_xml_cache[filepath]
 
         if filepath in self._xml_cache:
+            if self._xml_cache_budget is not None:
+                self._xml_cache.move_to_end(filepath)
             return self._xml_cache[filepath]
 
-        blob = self.get_file(filepath)
-        tree = self._parse_xml(blob)
-        self._xml_cache[filepath] = tree
-        return tree
+        return self._parse_xml_once(filepath)
+
+    async def aget_file_xml(self, filepath: str, executor: Executor = None) -> ElementTree:
+        return await run_in_executor(executor, self.get_file_xml, filepath)
+
+    def preload(self, filepaths: Iterable[str], workers: Optional[int] = None) -> None:
+        """
+        Decompresses and parses xml files on a thread pool and puts them into the xml cache.
+        Zip reading is thread-safe, every reader seeks its own position under the zip lock,
+        while decompressing and parsing happen in parallel.
+        """
+
+        filepaths = [it for it in set(filepaths) if it not in self._xml_cache and it not in self._changed_xml_cache]
+        if len(filepaths) == 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            blobs_and_trees = executor.map(self._read_and_parse_xml, filepaths)
+            for filepath, (blob_size, tree) in zip(filepaths, blobs_and_trees):
+                with self._xml_cache_lock:
+                    if filepath not in self._xml_cache:  # it could be read by another thread meanwhile
+                        self._put_to_xml_cache(filepath, tree, blob_size)
+
+    def pin_xml(self, filepath: str) -> None:
+        """
+        Keeps the parsed tree of the part from eviction, because its elements are referenced and may be changed.
+        Every pin_xml() call needs its own unpin_xml() call.
+        """
+
+        self._pinned_xml_counts[filepath] = self._pinned_xml_counts.get(filepath, 0) + 1
+
+    def unpin_xml(self, filepath: str) -> None:
+        """
+        Doesn't evict anything, it may be called by gc in the middle of any other call.
+        The tree is evicted when the next parsed tree is put to the xml cache.
+        """
+
+        count = self._pinned_xml_counts.get(filepath, 0)
+        if count <= 1:
+            self._pinned_xml_counts.pop(filepath, None)
+        else:
+            self._pinned_xml_counts[filepath] = count - 1
+
+    def add_xml_eviction_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        :param listener: called with the filepath of an evicted xml, elements of the evicted tree must not be used
+        after that, because the next get_file_xml() call returns a new tree
+        """
+
+        self._xml_eviction_listeners.append(listener)
+
+    def add_file_read_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        :param listener: called with the filepath on every get_file() and get_file_xml()
+        """
+
+        self._file_read_listeners.append(listener)
+
+    def add_file_change_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        :param listener: called with the filepath when a file is replaced, copied over or deleted,
+        but not when the same xml tree changed in place is saved
+        """
+
+        self._file_change_listeners.append(listener)
 
     def save_file(self, filepath: str, contents: bytes) -> None:
         self._clear_file_caches(filepath)
         self._changed_files_cache[filepath] = contents
+        self._mark_file_existing(filepath)
+        self._notify_file_changed(filepath)
 
     def save_file_str(self, filepath: str, contents: str) -> None:
         self.save_file(filepath, contents.encode('utf-8'))
 
     def save_file_xml(self, filepath: str, tree: ElementTree) -> None:
+        current_tree = self._changed_xml_cache.get(filepath)
+        if current_tree is None:
+            current_tree = self._xml_cache.get(filepath)
+
         self._clear_file_caches(filepath)
         self._changed_xml_cache[filepath] = tree
+        self._mark_file_existing(filepath)
+        if tree is not current_tree:
+            self._notify_file_changed(filepath)
 
     def copy_file(self, old_filepath: str, new_filepath: str) -> None:
         self._clear_file_caches(new_filepath)
         self._changed_files_cache[new_filepath] = self.get_file(old_filepath)
+        self._mark_file_existing(new_filepath)
+        self._notify_file_changed(new_filepath)
 
     def copy_file_from(self, loader, filepath: str, new_filepath: str) -> None:
         self._clear_file_caches(new_filepath)
         self._changed_files_cache[new_filepath] = loader.get_file(filepath)
+        self._mark_file_existing(new_filepath)
+        self._notify_file_changed(new_filepath)
 
     def delete_file(self, filepath: str) -> None:
         self._clear_file_caches(filepath)
         self._deleted_files.add(filepath)
+        self._part_index.remove(filepath)
+        self._notify_file_changed(filepath)
+
+    @staticmethod
+    def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+
+    @staticmethod
+    def _make_src_stat(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _get_src_path(self) -> str:
+        if self._base is not None:
+            raise ValueError('Overlay loader shares its source with the base, it can\'t be saved in place')
+        src_path = self._zip.filename if self._zip is not None else None
+        if src_path is None or not os.path.isfile(src_path):
+            raise ValueError('Loader was not loaded from a file path')
+        return src_path
+
+    def _release_zip(self) -> None:
+        self._zip_users.discard(self)
+        if len(self._zip_users) == 0:
+            src = self._zip.fp
+            self._zip.close()
+            if isinstance(src, MappedFile):
+                src.close()  # a zip doesn't close a file object it was given, only the mapped one is ours
+
+    def _reload_saved_src(self, src_path: str) -> None:
+        changed_xml_cache = self._changed_xml_cache
+
+        self._changed_xml_cache = dict()
+        self._changed_files_cache = dict()
+        self._deleted_files = set()
+        self.load_path(src_path)
+
+        # changed trees are in the file now, they stay parsed, so that handles to their elements remain valid
+        for path, tree in changed_xml_cache.items():
+            if self._part_index.has(path):
+                self._put_to_xml_cache(path, tree, self._zip.getinfo(path).file_size)
+
+    def _iter_write_members(self, new_zip: ZipFile, executor: Executor, do_copy_unchanged_raw: bool,
+                            compression_policy: CompressionPolicy) -> Iterator[None]:
+        changed_filepaths = list(self._iter_changed_filepaths())
+        unchanged_filepaths = list(self._iter_unchanged_filepaths())
+
+        # serialize and compress in parallel, write in a deterministic order
+        compressed_members = executor.map(lambda it: compression_policy.compress(it, self.get_file(it)),
+                                          changed_filepaths)
+        for path, member in zip(changed_filepaths, compressed_members):
+            write_compressed_member(new_zip, path, member)
+            yield
+
+        for path in unchanged_filepaths:
+            if do_copy_unchanged_raw:
+                yield from iter_copy_raw_member(self._zip, self._zip.getinfo(path), new_zip)
+            else:
+                write_compressed_member(new_zip, path, compression_policy.compress(path, self._zip.read(path)))
+                yield
+
+    def _iter_changed_filepaths(self) -> Iterator[str]:
+        processed_files = set(self._deleted_files)  # skip deleted files
+
+        for path in itertools.chain(self._changed_xml_cache.keys(), self._changed_files_cache.keys()):
+            if path in processed_files:
+                continue
+            processed_files.add(path)
+            yield path
+
+    def _iter_unchanged_filepaths(self) -> Iterator[str]:
+        if self._zip is None:
+            return
+
+        for path in self._zip.namelist():
+            if path in self._deleted_files or path in self._changed_xml_cache or path in self._changed_files_cache:
+                continue
+            yield path
+
+    def _parse_xml_once(self, filepath: str) -> ElementTree:
+        """
+        Threads reading the same part at the same time wait for the first of them to parse it,
+        so they all get the same tree, while different parts are parsed in parallel.
+        """
+
+        with self._xml_cache_lock:
+            tree = self._xml_cache.get(filepath)
+            if tree is not None:
+                return tree
+            future = self._xml_parses.get(filepath)
+            is_parsing_here = future is None
+            if is_parsing_here:
+                future = Future()
+                self._xml_parses[filepath] = future
+        if not is_parsing_here:
+            return future.result()
+
+        try:
+            if tracing.tracer is not None:
+                with tracing.span('loader.get_file_xml', {'path': filepath}) as attributes:
+                    blob_size, tree = self._read_and_parse_xml(filepath)
+                    attributes['size'] = blob_size
+            else:
+                blob_size, tree = self._read_and_parse_xml(filepath)
+        except BaseException as e:
+            with self._xml_cache_lock:
+                del self._xml_parses[filepath]
+            future.set_exception(e)
+            raise
+
+        with self._xml_cache_lock:
+            cached_tree = self._xml_cache.get(filepath)  # preload() could put it meanwhile
+            if cached_tree is None:
+                self._put_to_xml_cache(filepath, tree, blob_size)
+            else:
+                tree = cached_tree
+            del self._xml_parses[filepath]
+        future.set_result(tree)
+        return tree
+
+    def _put_to_xml_cache(self, filepath: str, tree: ElementTree, size: int) -> None:
+        self._xml_cache[filepath] = tree
+        self._xml_cache_sizes[filepath] = size
+        self._xml_cache_size += size
+        self._evict_xml_cache()
+
+    def _pop_from_xml_cache(self, filepath: str) -> Optional[ElementTree]:
+        tree = self._xml_cache.pop(filepath, None)
+        if tree is not None:
+            self._xml_cache_size -= self._xml_cache_sizes.pop(filepath)
+        return tree
+
+    def _evict_xml_cache(self) -> None:
+        if self._xml_cache_budget is None:
+            return
+
+        if self._xml_cache_size <= self._xml_cache_budget:
+            return
+
+        # the newest tree always stays, even if it's larger than the budget alone
+        for filepath in list(self._xml_cache)[:-1]:
+            if self._xml_cache_size <= self._xml_cache_budget:
+                break
+            if filepath in self._pinned_xml_counts:
+                continue
+            self._pop_from_xml_cache(filepath)
+            for listener in self._xml_eviction_listeners:
+                listener(filepath)
+
+    def _notify_file_changed(self, filepath: str) -> None:
+        for listener in self._file_change_listeners:
+            listener(filepath)
+
+    def _mark_file_existing(self, filepath: str) -> None:
+        self._deleted_files.discard(filepath)
+        self._part_index.add(filepath)
 
     def _clear_file_caches(self, filepath: str) -> None:
-        self._xml_cache.pop(filepath, None)
+        if self._is_frozen:
+            raise ValueError('Loader is frozen')
+        self._pop_from_xml_cache(filepath)
         self._changed_files_cache.pop(filepath, None)
         self._changed_xml_cache.pop(filepath, None)
 
-    @staticmethod
-    def _parse_xml(blob: bytes) -> ElementTree:
-        blob = blob.decode('utf-8')
-        blob = blob.lstrip()
-        blob = blob.encode('utf-8')
-        return etree.fromstring(blob)
+    def _parse_xml(self, blob: bytes) -> ElementTree:
+        return self._xml_parser.parse(blob)
+
+    def _read_and_parse_xml(self, filepath: str) -> Tuple[int, ElementTree]:
+        if self._base is not None and filepath not in self._changed_files_cache:
+            size_and_tree = self._base._copy_frozen_xml(filepath)
+            if size_and_tree is not None:
+                return size_and_tree
+
+        blob = self.get_file(filepath)
+        return len(blob), self._parse_xml(blob)
+
+    def _copy_frozen_xml(self, filepath: str) -> Optional[Tuple[int, ElementTree]]:
+        tree = self._xml_cache.get(filepath)
+        if tree is None:
+            return None
+        with self._frozen_lock:  # overlays in different threads copy the same trees
+            return self._xml_cache_sizes[filepath], copy.deepcopy(tree)
 
     @staticmethod
     def _stringify_xml(tree: ElementTree) -> bytes:
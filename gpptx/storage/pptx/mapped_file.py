@@ -0,0 +1,59 @@
+import io
+import mmap
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Read-only file object over a memory-mapped file. Processes mapping the same file share its page cache pages.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.name = path
+        with open(path, mode='rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            end = len(self._mmap)
+        else:
+            end = min(self._pos + size, len(self._mmap))
+        if end <= self._pos:
+            return b''
+        chunk = self._mmap[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def readinto(self, b) -> int:
+        chunk = self.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            new_pos = offset
+        elif whence == io.SEEK_CUR:
+            new_pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            new_pos = len(self._mmap) + offset
+        else:
+            raise ValueError(f'Invalid whence {whence}')
+        if new_pos < 0:
+            raise ValueError(f'Negative seek position {new_pos}')
+        self._pos = new_pos
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._mmap.close()
+        super().close()
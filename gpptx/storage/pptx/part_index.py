@@ -0,0 +1,139 @@
+import re
+from typing import Dict, Set, Iterable, Tuple, List, Optional
+
+_CONTENT_NAME_INDEX_REGEX = re.compile(r'^(.+?)(\d+)\.')
+_RELS_EXT = '.rels'
+
+
+class PartIndex:
+    """
+    Index of existing package part names by directory and by content name with its number,
+    e.g. ppt/slides/slide3.xml is in directory 'ppt/slides/' and has content name 'slide' and index 3.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._paths: Set[str] = set()
+        self._rels_paths: Set[str] = set()
+        self._paths_by_dir: Dict[str, Set[str]] = dict()
+        self._paths_by_content: Dict[Tuple[str, str], Dict[int, Set[str]]] = dict()
+        self._last_indexes: Dict[Tuple[str, str], int] = dict()
+
+        for path in paths:
+            self.add(path)
+
+    @property
+    def paths(self) -> Set[str]:
+        return self._paths
+
+    @property
+    def rels_paths(self) -> Set[str]:
+        return self._rels_paths
+
+    def has(self, path: str) -> bool:
+        return path in self._paths
+
+    def add(self, path: str) -> None:
+        if path in self._paths:
+            return
+        self._paths.add(path)
+
+        if path.endswith(_RELS_EXT):
+            self._rels_paths.add(path)
+
+        dir_, name = self._split_path(path)
+        self._paths_by_dir.setdefault(dir_, set()).add(path)
+
+        content_key_and_index = self._make_content_key_and_index(dir_, name)
+        if content_key_and_index is not None:
+            content_key, index = content_key_and_index
+            self._paths_by_content.setdefault(content_key, dict()).setdefault(index, set()).add(path)
+            last_index = self._last_indexes.get(content_key)
+            if last_index is not None and index > last_index:
+                self._last_indexes[content_key] = index
+
+    def remove(self, path: str) -> None:
+        if path not in self._paths:
+            return
+        self._paths.remove(path)
+        self._rels_paths.discard(path)
+
+        dir_, name = self._split_path(path)
+        dir_paths = self._paths_by_dir[dir_]
+        dir_paths.remove(path)
+        if len(dir_paths) == 0:
+            del self._paths_by_dir[dir_]
+
+        content_key_and_index = self._make_content_key_and_index(dir_, name)
+        if content_key_and_index is not None:
+            content_key, index = content_key_and_index
+            paths_by_index = self._paths_by_content[content_key]
+            paths_by_index[index].remove(path)
+            if len(paths_by_index[index]) == 0:
+                del paths_by_index[index]
+                if self._last_indexes.get(content_key) == index:
+                    del self._last_indexes[content_key]  # recalculated on demand
+            if len(paths_by_index) == 0:
+                del self._paths_by_content[content_key]
+
+    def get_dir_paths(self, dir_: str, do_include_subdirs: bool = False) -> List[str]:
+        """
+        :param dir_: directory with a trailing slash, e.g. 'ppt/slides/'
+        """
+
+        if not do_include_subdirs:
+            return list(self._paths_by_dir.get(dir_, ()))
+
+        paths = list()
+        for it_dir, it_paths in self._paths_by_dir.items():
+            if it_dir.startswith(dir_):
+                paths.extend(it_paths)
+        return paths
+
+    def get_content_paths(self, dir_: str, content_name: str) -> List[str]:
+        """
+        :return: paths sorted by their index
+        """
+
+        paths_by_index = self._paths_by_content.get((dir_, content_name))
+        if paths_by_index is None:
+            return list()
+        return [path for index in sorted(paths_by_index.keys()) for path in sorted(paths_by_index[index])]
+
+    def get_last_index(self, dir_: str, content_name: str) -> int:
+        """
+        :return: 0 if there is no such content
+        """
+
+        content_key = (dir_, content_name)
+        last_index = self._last_indexes.get(content_key)
+        if last_index is None:
+            paths_by_index = self._paths_by_content.get(content_key)
+            if paths_by_index is None:
+                return 0
+            last_index = max(paths_by_index.keys())
+            self._last_indexes[content_key] = last_index
+        return last_index
+
+    def duplicate(self):
+        new_index = PartIndex()
+        new_index._paths = set(self._paths)
+        new_index._rels_paths = set(self._rels_paths)
+        new_index._paths_by_dir = {k: set(v) for k, v in self._paths_by_dir.items()}
+        new_index._paths_by_content = {k: {index: set(paths) for index, paths in v.items()}
+                                       for k, v in self._paths_by_content.items()}
+        new_index._last_indexes = dict(self._last_indexes)
+        return new_index
+
+    @staticmethod
+    def _split_path(path: str) -> Tuple[str, str]:
+        dir_, slash, name = path.rpartition('/')
+        return dir_ + slash, name
+
+    @staticmethod
+    def _make_content_key_and_index(dir_: str, name: str) -> Optional[Tuple[Tuple[str, str], int]]:
+        if name.endswith(_RELS_EXT):
+            return None
+        match = _CONTENT_NAME_INDEX_REGEX.match(name)
+        if match is None:
+            return None
+        return (dir_, match.group(1)), int(match.group(2))
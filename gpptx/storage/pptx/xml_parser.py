@@ -0,0 +1,43 @@
+import threading
+
+from lxml import etree
+from lxml.etree import ElementTree
+
+
+class XmlParserOptions:
+    __slots__ = ('huge_tree', 'remove_blank_text', 'resolve_entities')
+
+    def __init__(self, huge_tree: bool = False, remove_blank_text: bool = False, resolve_entities: bool = False):
+        self.huge_tree = huge_tree
+        self.remove_blank_text = remove_blank_text
+        self.resolve_entities = resolve_entities
+
+
+class ThreadLocalXmlParser:
+    """
+    Parsers can't be shared between threads, so every thread gets its own one, created once and reused.
+    """
+
+    def __init__(self, options: XmlParserOptions = None):
+        if options is None:
+            options = XmlParserOptions()
+        self._options = options
+        self._local = threading.local()
+
+    @property
+    def options(self) -> XmlParserOptions:
+        return self._options
+
+    def parse(self, blob: bytes) -> ElementTree:
+        if blob[:1].isspace():
+            blob = blob.lstrip()  # xml declaration is allowed only at the very beginning
+        return etree.fromstring(blob, parser=self._get_parser())
+
+    def _get_parser(self) -> etree.XMLParser:
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            parser = etree.XMLParser(huge_tree=self._options.huge_tree,
+                                     remove_blank_text=self._options.remove_blank_text,
+                                     resolve_entities=self._options.resolve_entities)
+            self._local.parser = parser
+        return parser
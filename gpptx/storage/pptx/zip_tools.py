@@ -0,0 +1,181 @@
+import copy
+import hashlib
+import struct
+import time
+import zlib
+from typing import Set, Iterator, List, Iterable
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+_LOCAL_FILE_HEADER_STRUCT = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_FILE_HEADER_SIGNATURE = b'PK\003\004'
+_LOCAL_FILE_HEADER_FILENAME_LENGTH_INDEX = 10
+_LOCAL_FILE_HEADER_EXTRA_LENGTH_INDEX = 11
+_DATA_DESCRIPTOR_FLAG = 0x08
+_COPY_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_FILE_ATTRIBUTES = 0o600 << 16
+
+
+class CompressedMember:
+    __slots__ = ('data', 'crc', 'file_size', 'compress_type')
+
+    def __init__(self, data: bytes, crc: int, file_size: int, compress_type: int):
+        self.data = data
+        self.crc = crc
+        self.file_size = file_size
+        self.compress_type = compress_type
+
+
+def compress_member(contents: bytes, compress_type: int = ZIP_DEFLATED,
+                    compress_level: int = zlib.Z_DEFAULT_COMPRESSION) -> CompressedMember:
+    """
+    Compresses contents the same way ZipFile does, so it can be done out of the archive lock.
+    """
+
+    crc = zlib.crc32(contents)
+    if compress_type == ZIP_STORED:
+        return CompressedMember(contents, crc, len(contents), compress_type)
+    if compress_type == ZIP_DEFLATED:
+        compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+        data = compressor.compress(contents) + compressor.flush()
+        return CompressedMember(data, crc, len(contents), compress_type)
+    raise ValueError(f'Unsupported compress type {compress_type}')
+
+
+def write_compressed_member(zip_file: ZipFile, filename: str, member: CompressedMember) -> None:
+    zinfo = ZipInfo(filename, date_time=time.localtime(time.time())[:6])
+    zinfo.external_attr = _DEFAULT_FILE_ATTRIBUTES
+    zinfo.compress_type = member.compress_type
+    zinfo.CRC = member.crc
+    zinfo.file_size = member.file_size
+    zinfo.compress_size = len(member.data)
+
+    # noinspection PyProtectedMember
+    with zip_file._lock:
+        _begin_raw_member(zip_file, zinfo)
+        zip_file.fp.write(member.data)
+        _end_raw_member(zip_file, zinfo)
+
+
+def iter_copy_raw_member(src_zip: ZipFile, zinfo: ZipInfo, dest_zip: ZipFile) -> Iterator[None]:
+    """
+    Copies compressed bytes of a member as is, without decompressing and compressing them again,
+    and yields after every copied chunk.
+    Source position is sought again for every chunk, so the source zip can be read by others in between.
+    """
+
+    new_zinfo = copy.copy(zinfo)
+    new_zinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG  # sizes and crc are known, so they go to the local header
+
+    # noinspection PyProtectedMember
+    with src_zip._lock:
+        data_offset = _seek_to_member_data(src_zip, zinfo)
+    # noinspection PyProtectedMember
+    with dest_zip._lock:
+        _begin_raw_member(dest_zip, new_zinfo)
+
+    left_size = zinfo.compress_size
+    while left_size > 0:
+        # noinspection PyProtectedMember
+        with src_zip._lock:
+            src_zip.fp.seek(data_offset)
+            chunk = src_zip.fp.read(min(left_size, _COPY_CHUNK_SIZE))
+        if len(chunk) == 0:
+            raise EOFError(f'Unexpected end of zip while copying {zinfo.filename}')
+        dest_zip.fp.write(chunk)
+        data_offset += len(chunk)
+        left_size -= len(chunk)
+        yield
+
+    # noinspection PyProtectedMember
+    with dest_zip._lock:
+        _end_raw_member(dest_zip, new_zinfo)
+
+
+class ChunkBuffer:
+    """
+    Write-only file object without tell() and seek(), so ZipFile writes to it sequentially.
+    Written bytes are taken out of it in chunks.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = list()
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        if len(data) > 0:
+            self._chunks.append(bytes(data))
+            self._size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop_chunks(self, chunk_size: int, do_pop_rest: bool = False) -> Iterator[bytes]:
+        if self._size < chunk_size and not do_pop_rest:
+            return
+
+        data = b''.join(self._chunks)
+        end = len(data) if do_pop_rest else len(data) - len(data) % chunk_size
+        for i in range(0, end, chunk_size):
+            yield data[i:i + chunk_size]
+
+        rest = data[end:]
+        self._chunks = [rest] if len(rest) > 0 else list()
+        self._size = len(rest)
+
+
+def make_zip_fingerprint(zinfos: Iterable[ZipInfo]) -> str:
+    """
+    Fingerprint of the contents of the members by the central directory only, names, crc and sizes.
+    """
+
+    fingerprint = hashlib.sha256()
+    for zinfo in sorted(zinfos, key=lambda it: it.filename):
+        fingerprint.update(f'{zinfo.filename}\0{zinfo.CRC:08x}\0{zinfo.file_size}\n'.encode('utf-8'))
+    return fingerprint.hexdigest()
+
+
+# noinspection PyProtectedMember
+def remove_members(zip_file: ZipFile, filenames: Set[str]) -> None:
+    """
+    Removes members from the central directory of an archive opened for appending.
+    Their data is left in the file as dead space.
+    """
+
+    with zip_file._lock:
+        zip_file.filelist = [it for it in zip_file.filelist if it.filename not in filenames]
+        zip_file.NameToInfo = {it.filename: it for it in zip_file.filelist}
+        zip_file._didModify = True
+
+
+def _seek_to_member_data(zip_file: ZipFile, zinfo: ZipInfo) -> int:
+    zip_file.fp.seek(zinfo.header_offset)
+    header = zip_file.fp.read(_LOCAL_FILE_HEADER_STRUCT.size)
+    if len(header) != _LOCAL_FILE_HEADER_STRUCT.size:
+        raise EOFError(f'Truncated local file header of {zinfo.filename}')
+
+    header = _LOCAL_FILE_HEADER_STRUCT.unpack(header)
+    if header[0] != _LOCAL_FILE_HEADER_SIGNATURE:
+        raise ValueError(f'Bad local file header signature of {zinfo.filename}')
+
+    return zip_file.fp.seek(header[_LOCAL_FILE_HEADER_FILENAME_LENGTH_INDEX] +
+                            header[_LOCAL_FILE_HEADER_EXTRA_LENGTH_INDEX], 1)
+
+
+# noinspection PyProtectedMember
+def _begin_raw_member(zip_file: ZipFile, zinfo: ZipInfo) -> None:
+    if zip_file._seekable:
+        zip_file.fp.seek(zip_file.start_dir)
+    zinfo.header_offset = zip_file.fp.tell()
+
+    zip_file._writecheck(zinfo)
+    zip_file._didModify = True
+
+    zip_file.fp.write(zinfo.FileHeader())
+
+
+# noinspection PyProtectedMember
+def _end_raw_member(zip_file: ZipFile, zinfo: ZipInfo) -> None:
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+    zip_file.start_dir = zip_file.fp.tell()
@@ -1,8 +1,29 @@
-from gpptx.storage.cache.cacher import Cacher
+import weakref
+from typing import Dict, Set, Any, Callable, Iterable
+
+from gpptx.storage.cache.cacher import Cacher, CacheKey
+from gpptx.storage.cache.part_stamps import stamp_persisting_cache, drop_stale_persisting_cache, \
+    drop_persisting_cache_based_on_part, map_untracked_persisting_cache
 from gpptx.storage.cache.stats import Stats
 from gpptx.storage.pptx.loader import Loader
 
 
+def _make_weak_listener(method: Callable[[str], None]) -> Callable[[str], None]:
+    """
+    The storage keeps the loader, so listeners of the loader mustn't keep the storage,
+    otherwise the storage with its open source file would be freed by the cyclic gc only.
+    """
+
+    method_ref = weakref.WeakMethod(method)
+
+    def listener(filepath: str) -> None:
+        alive_method = method_ref()
+        if alive_method is not None:
+            alive_method(filepath)
+
+    return listener
+
+
 class PresentationStorage:
     def __init__(self, loader: Loader, cacher: Cacher, do_log_stats: bool = False):
         self._loader = loader
@@ -10,6 +31,16 @@ class PresentationStorage:
         self._stats = Stats()
         self._do_log_stats = do_log_stats
 
+        self._part_cache_keys: Dict[str, Set[CacheKey]] = dict()
+        self._loader.add_xml_eviction_listener(_make_weak_listener(self._release_part_handles))
+        # the cacher doesn't keep the storage or the loader, and the read listener is called on every read
+        self._loader.add_file_read_listener(self._cacher.dependencies.note_part_read)
+        self._loader.add_file_change_listener(_make_weak_listener(self._invalidate_part_dependents))
+
+        # e.g. restored from a snapshot, duplicates of mapped cachers share the map
+        if self._cacher.has_untracked_persisting_values and self._cacher.untracked_branches_by_part is None:
+            map_untracked_persisting_cache(self._loader, self._cacher)
+
     @property
     def loader(self) -> Loader:
         return self._loader
@@ -29,3 +60,70 @@ class PresentationStorage:
     @do_log_stats.setter
     def do_log_stats(self, v: bool) -> None:
         self._do_log_stats = v
+
+    def load_persisting_cache(self, cache: Dict[str, Any]) -> None:
+        """
+        Branches stamped by the parts which have changed since then are dropped, see part_stamps.
+        """
+
+        self._cacher.load_persisting_cache(cache)
+        drop_stale_persisting_cache(self._loader, self._cacher)
+        map_untracked_persisting_cache(self._loader, self._cacher)
+
+    def load_persisting_cache_file(self, path: str) -> None:
+        """
+        :raise ValueError: if the file is broken, the persisting cache is left empty then
+        """
+
+        try:
+            self._cacher.load_persisting_cache_file(path)
+            # branches are decoded lazily, so broken ones may be found by the checks of the stamps
+            drop_stale_persisting_cache(self._loader, self._cacher)
+            map_untracked_persisting_cache(self._loader, self._cacher)
+        except ValueError:
+            self._cacher.clear_persisting_cache()
+            raise
+
+    def merge_persisting_caches(self, caches: Iterable[Dict[str, Any]]) -> None:
+        """
+        See Cacher.merge_persisting_cache(), the merged values are mapped by their parts once after all of them.
+        """
+
+        for cache in caches:
+            self._cacher.merge_persisting_cache(cache)
+        if self._cacher.has_untracked_persisting_values and self._cacher.untracked_branches_by_part is None:
+            map_untracked_persisting_cache(self._loader, self._cacher)
+
+    def dump_persisting_cache(self) -> Dict[str, Any]:
+        cache = self._cacher.dump_persisting_cache()
+        stamp_persisting_cache(self._loader, cache)
+        return cache
+
+    def bind_part_node(self, filepath: str, node) -> None:
+        """
+        Notes that the node and the local cache under its key may keep elements of the xml part.
+        The part isn't evicted by the loader while the node is alive, since changes of the elements would be lost,
+        and the local cache is released when the part is evicted.
+        Nodes of the elements of the part keep the node of the part, e.g. Slide, alive.
+        """
+
+        if self._loader.xml_cache_budget is None:
+            return
+
+        # noinspection PyProtectedMember
+        cache_key: CacheKey = node._storage_cache_key
+        # without postfix, it's a son of the key
+        self._part_cache_keys.setdefault(filepath, set()).add(cache_key.with_postfix(None))
+
+        self._loader.pin_xml(filepath)
+        finalizer = weakref.finalize(node, self._loader.unpin_xml, filepath)
+        finalizer.atexit = False
+
+    def _release_part_handles(self, filepath: str) -> None:
+        for cache_key in self._part_cache_keys.pop(filepath, set()):
+            self._cacher.delete_handles_from_local_cache(cache_key)
+
+    def _invalidate_part_dependents(self, filepath: str) -> None:
+        self._cacher.invalidate_part_dependents(filepath)
+        if self._cacher.has_untracked_persisting_values:
+            drop_persisting_cache_based_on_part(self._loader, self._cacher, filepath)
@@ -1,26 +1,31 @@
-import re
-from typing import List, Optional
+from typing import List, Optional, Collection
 
 from lxml.etree import ElementTree
 
-from gpptx.pptx_tools.paths import SLIDES_PATH_PREFIX_WITH_FILE, PRESENTATION_PATH
+from gpptx.pptx_tools.paths import SLIDES_PATH_PREFIX, PRESENTATION_PATH, SLIDE_LAYOUTS_PATH_PREFIX, \
+    SLIDE_MASTERS_PATH_PREFIX, THEMES_DIR_PATH_PREFIX, make_rels_path, find_slide_paths
 from gpptx.pptx_tools.xml_namespaces import pptx_xml_ns
 from gpptx.storage.cache.cacher import CacheKey
 from gpptx.storage.cache.decorator import cache_persist_property, cache_local_property
 from gpptx.storage.storage import PresentationStorage
 from gpptx.types.slides_coll import SlidesCollection
 from gpptx.types.units import Emu
+from gpptx.types.warmup import warm_cache
 from gpptx.types.xml_node import CacheDecoratableXmlNode
 from gpptx.util.list import first_or_none
 
 
 class Presentation(CacheDecoratableXmlNode):
-    _SLIDE_ID_REGEX = re.compile(r'ppt/slides/slide(\d+).xml')
+    _PRELOADED_CONTENTS = ((SLIDES_PATH_PREFIX, 'slide'),
+                           (SLIDE_LAYOUTS_PATH_PREFIX, 'slideLayout'),
+                           (SLIDE_MASTERS_PATH_PREFIX, 'slideMaster'),
+                           (THEMES_DIR_PATH_PREFIX, 'theme'))
 
-    __slots__ = ()
+    __slots__ = ('__weakref__',)
 
     def __init__(self, storage: PresentationStorage, cache_key: CacheKey):
         super().__init__(storage, cache_key)
+        self._storage.bind_part_node(PRESENTATION_PATH, self)
 
     @property
     def xml(self) -> ElementTree:
@@ -33,6 +38,26 @@ class Presentation(CacheDecoratableXmlNode):
     def slides(self) -> SlidesCollection:
         return SlidesCollection(self._storage, self._storage_cache_key.make_son('slides'), self, self._slide_paths)
 
+    def preload_all_slides(self, workers: Optional[int] = None) -> None:
+        loader = self._storage.loader
+
+        paths = list()
+        for dir_, content_name in self._PRELOADED_CONTENTS:
+            paths.extend(loader.part_index.get_content_paths(dir_, content_name))
+        rels_paths = [make_rels_path(path) for path in paths]
+        paths.extend(path for path in rels_paths if loader.does_file_exist(path))
+
+        loader.preload(paths, workers=workers)
+
+    def warm_cache(self, properties: Optional[Collection[str]] = None, workers: Optional[int] = None) -> None:
+        """
+        Computes the persisting properties of everything in the presentation, so they are cached before being read.
+        :param properties: names of the properties to compute, all of them by default
+        :param workers: number of processes the slides are split between, the current process only by default
+        """
+
+        warm_cache(self, properties=properties, workers=workers)
+
     @cache_persist_property
     def slide_width(self) -> Optional[Emu]:
         if self._sld_sz is not None:
@@ -75,9 +100,7 @@ class Presentation(CacheDecoratableXmlNode):
 
     @cache_persist_property
     def _slide_paths(self) -> List[str]:
-        paths = [path for path in self._storage.loader.get_filelist() if path.startswith(SLIDES_PATH_PREFIX_WITH_FILE)]
-        paths.sort(key=lambda it: int(self._SLIDE_ID_REGEX.match(it)[1]))
-        return paths
+        return find_slide_paths(self._storage.loader)
 
     @cache_local_property
     def _sld_sz(self) -> Optional[ElementTree]:
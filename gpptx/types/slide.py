@@ -19,7 +19,7 @@ from gpptx.util.list import first_or_none
 
 
 class SlideLike(CacheDecoratableXmlNode, ABC):
-    __slots__ = ('_presentation',)
+    __slots__ = ('_presentation', '__weakref__')
 
     def __init__(self, storage: PresentationStorage, cache_key: CacheKey, presentation):
         super().__init__(storage, cache_key)
@@ -88,6 +88,7 @@ class SlideMaster(SlideLike):
         self._storage = storage
         self._storage_cache_key = cache_key
         self._xml_path = xml_path
+        self._storage.bind_part_node(xml_path, self)
 
     @property
     def xml(self) -> ElementTree:
@@ -125,6 +126,7 @@ class SlideLayout(SlideLike):
         self._storage = storage
         self._storage_cache_key = cache_key
         self._xml_path = xml_path
+        self._storage.bind_part_node(xml_path, self)
 
     @property
     def xml(self) -> ElementTree:
@@ -166,6 +168,7 @@ class Slide(SlideLike):
         self._storage = storage
         self._storage_cache_key = cache_key
         self._xml_path = xml_path
+        self._storage.bind_part_node(xml_path, self)
 
     @property
     def xml(self) -> ElementTree:
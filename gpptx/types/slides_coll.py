@@ -3,7 +3,7 @@ from typing import Iterator, List
 from gpptx.pptx_tools.index import make_pptx_index
 from gpptx.pptx_tools.slide import delete_slide, delete_all_slides_except
 from gpptx.storage.cache.cacher import CacheKey
-from gpptx.storage.cache.decorator import CacheDecoratable
+from gpptx.storage.cache.decorator import CacheDecoratable, update_decorator_cache
 from gpptx.storage.storage import PresentationStorage
 from gpptx.types.slide import Slide
 
@@ -39,7 +39,7 @@ class SlidesCollection(CacheDecoratable):
         for i in range(index+1, len(self)):
             self._storage.cacher.rename_branch_in_any_cache(self._storage_cache_key.make_son(str(i)), str(i-1))
 
-        self._slide_paths.pop(index)
+        self._set_slide_paths(self._slide_paths[:index] + self._slide_paths[index+1:])
 
     def delete_all_except(self, index: int) -> None:
         # delete
@@ -53,4 +53,9 @@ class SlidesCollection(CacheDecoratable):
 
         self._storage.cacher.rename_branch_in_any_cache(self._storage_cache_key.make_son(str(index)), str(0))
 
-        self._slide_paths = [self._slide_paths[index]]
+        self._set_slide_paths([self._slide_paths[index]])
+
+    def _set_slide_paths(self, slide_paths: List[str]) -> None:
+        # cached lists may be shared with duplicated containers, so they are replaced instead of being changed
+        self._slide_paths = slide_paths
+        update_decorator_cache(self._presentation, '_slide_paths', value=slide_paths, do_change_persisting_cache=True)
@@ -11,7 +11,7 @@ from gpptx.types.xml_node import CacheDecoratableXmlNode
 
 
 class Theme(CacheDecoratableXmlNode):
-    __slots__ = ('_xml_path', '_slide_master')
+    __slots__ = ('_xml_path', '_slide_master', '__weakref__')
 
     def __init__(self, storage: PresentationStorage, cache_key: CacheKey, xml_path: str, slide_master):
         from gpptx.types.slide import SlideMaster
@@ -19,6 +19,7 @@ class Theme(CacheDecoratableXmlNode):
         super().__init__(storage, cache_key)
         self._xml_path = xml_path
         self._slide_master: SlideMaster = slide_master
+        self._storage.bind_part_node(xml_path, self)
 
     @property
     def xml(self) -> ElementTree:
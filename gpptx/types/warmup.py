@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Optional, Collection, Iterator, Set, Dict, Any, List
+
+from gpptx.storage.cache.cacher import Cacher, CacheKey
+from gpptx.storage.cache.decorator import CacheDecoratable, find_cache_persist_properties
+from gpptx.storage.pptx.loader import Loader
+from gpptx.storage.storage import PresentationStorage
+from gpptx.types.shape import ShapeDual, GroupShape, TextShape, PlaceholderShape, ImageShape, PatternShape
+from gpptx.types.shapes_coll import ShapesCollection
+from gpptx.types.slide import Slide, SlideLayout, SlideMaster
+from gpptx.types.text import TextFrame, ParagraphCollection, Paragraph, RunCollection
+from gpptx.types.theme import Theme
+
+_DUAL_SHAPE_TYPES = (TextShape, PlaceholderShape, ImageShape, PatternShape)
+
+
+def warm_cache(presentation, properties: Optional[Collection[str]] = None, workers: Optional[int] = None) -> None:
+    """
+    Computes the persisting properties of the presentation and of everything in its slides.
+    With workers, slides are split between processes, each of them warms its own cache,
+    and the caches are merged into the cache of the presentation.
+    """
+
+    warmer = _Warmer(properties)
+    warmer.warm_properties(presentation)
+
+    slides = presentation.slides
+    if workers is None or workers <= 1 or len(slides) <= 1:
+        for slide in slides:
+            warmer.warm(slide)
+        return
+
+    # noinspection PyProtectedMember
+    storage: PresentationStorage = presentation._storage
+    loader_snapshot = storage.loader.dump_snapshot()
+    properties = list(properties) if properties is not None else None
+
+    slide_indexes_chunks = [list(range(i, len(slides), workers)) for i in range(min(workers, len(slides)))]
+    with ProcessPoolExecutor(max_workers=len(slide_indexes_chunks)) as executor:
+        storage.merge_persisting_caches(executor.map(_warm_slides_in_process,
+                                                     repeat(loader_snapshot), slide_indexes_chunks, repeat(properties)))
+
+
+def _warm_slides_in_process(loader_snapshot: Dict[str, Any], slide_indexes: List[int],
+                            properties: Optional[List[str]]) -> Dict[str, Any]:
+    from gpptx.types.presentation import Presentation
+
+    storage = PresentationStorage(Loader.load_snapshot(loader_snapshot), Cacher())
+    slides = Presentation(storage, CacheKey('')).slides
+
+    warmer = _Warmer(properties)
+    for index in slide_indexes:
+        warmer.warm(slides[index])
+    return storage.cacher.dump_persisting_cache()
+
+
+class _Warmer:
+    def __init__(self, properties: Optional[Collection[str]]):
+        self._properties = set(properties) if properties is not None else None
+        self._warmed_part_keys: Set[CacheKey] = set()  # layouts, masters and themes are shared by slides
+
+    def warm(self, node: CacheDecoratable) -> None:
+        if isinstance(node, (SlideLayout, SlideMaster, Theme)):
+            # noinspection PyProtectedMember
+            if node._storage_cache_key in self._warmed_part_keys:
+                return
+            # noinspection PyProtectedMember
+            self._warmed_part_keys.add(node._storage_cache_key)
+
+        self.warm_properties(node)
+        for child in self._iter_children(node):
+            self.warm(child)
+
+    def warm_properties(self, node: CacheDecoratable) -> None:
+        for name in find_cache_persist_properties(type(node)):
+            if self._properties is None or name in self._properties:
+                getattr(node, name)
+
+    @staticmethod
+    def _iter_children(node: CacheDecoratable) -> Iterator[CacheDecoratable]:
+        if isinstance(node, Slide):
+            yield node.shapes
+            yield node.slide_layout
+        elif isinstance(node, SlideLayout):
+            yield node.shapes
+            yield node.slide_master
+        elif isinstance(node, SlideMaster):
+            yield node.shapes
+            yield node.theme
+        elif isinstance(node, (ShapesCollection, ParagraphCollection, RunCollection)):
+            yield from node
+        elif isinstance(node, ShapeDual):
+            for t in _DUAL_SHAPE_TYPES:
+                if node.can_convert_to(t):
+                    yield node.convert_to(t)
+        elif isinstance(node, GroupShape):
+            yield node.shapes
+        elif isinstance(node, TextShape):
+            yield node.text_frame
+        elif isinstance(node, PatternShape):
+            yield node.fill
+        elif isinstance(node, ImageShape):
+            yield node.image
+        elif isinstance(node, TextFrame):
+            yield node.paragraphs
+        elif isinstance(node, Paragraph):
+            yield node.runs
@@ -84,6 +84,6 @@ class CacheDecoratableXmlNode(BaseXmlNode, CacheDecoratable, ABC):
     def do_use_defaults_when_null(self, value: bool) -> None:
         self._do_use_defaults_when_null = value
         if self._do_use_defaults_when_null:
-            self._storage_cache_key.postfix = None
+            self._storage_cache_key = self._storage_cache_key.with_postfix(None)
         else:
-            self._storage_cache_key.postfix = 'disabled_defaults_when_null'
+            self._storage_cache_key = self._storage_cache_key.with_postfix('disabled_defaults_when_null')
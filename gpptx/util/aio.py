@@ -0,0 +1,22 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable, Any
+
+
+async def run_in_executor(executor: Executor, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await asyncio.get_event_loop().run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+async def run_cancellable_in_executor(executor: Executor, fn: Callable[[threading.Event], Any]) -> Any:
+    """
+    :param fn: receives an event which is set when the awaiting task is cancelled, it should stop as soon as it can
+    """
+
+    cancel_event = threading.Event()
+    try:
+        return await asyncio.get_event_loop().run_in_executor(executor, fn, cancel_event)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
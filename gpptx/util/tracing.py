@@ -0,0 +1,139 @@
+"""
+Spans of the hot paths: parsing parts in Loader.get_file_xml(), saving, computing cached values and pptx_tools
+operations. They are sent to the tracer set by set_tracer(), and cost a check of a global when there is none.
+"""
+
+import itertools
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Optional, Callable, TextIO, Iterator, List
+
+tracer: Optional['Tracer'] = None
+
+
+class Tracer(ABC):
+    @abstractmethod
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Any:
+        """
+        Spans of a thread are nested, every one ends before its parent.
+        :param attributes: the traced code may add more of them until the span ends
+        :return: token of the span, passed to end_span()
+        """
+
+    @abstractmethod
+    def end_span(self, token: Any, error: Optional[BaseException]) -> None:
+        pass
+
+
+def set_tracer(new_tracer: Optional[Tracer]) -> None:
+    global tracer
+    tracer = new_tracer
+
+
+@contextmanager
+def span(name: str, attributes: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Hot paths check the tracer before making the span, so they don't pay for the context manager without it.
+    :return: attributes of the span, which can be added to
+    """
+
+    current_tracer = tracer
+    if attributes is None:
+        attributes = dict()
+    if current_tracer is None:
+        yield attributes
+        return
+
+    token = current_tracer.start_span(name, attributes)
+    try:
+        yield attributes
+    except BaseException as e:
+        current_tracer.end_span(token, e)
+        raise
+    current_tracer.end_span(token, None)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator making a span of every call of the function.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class _JsonLinesSpan:
+    __slots__ = ('span_id', 'parent_id', 'name', 'attributes', 'start_time', 'start_counter')
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, attributes: Dict[str, Any]):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter()
+
+
+class JsonLinesTracer(Tracer):
+    """
+    Writes a json line per ended span: its id, the id of its parent, the thread, the name, the attributes,
+    the wall-clock start time, the duration in seconds and the error, if there was one.
+    """
+
+    def __init__(self, file: TextIO, do_flush: bool = False):
+        """
+        :param do_flush: flush the file after every line
+        """
+
+        self._file = file
+        self._do_flush = do_flush
+        self._lock = threading.Lock()
+        self._span_ids = itertools.count(1)
+        self._local = threading.local()
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Any:
+        stack = self._get_stack()
+        parent_id = stack[-1].span_id if len(stack) > 0 else None
+        new_span = _JsonLinesSpan(next(self._span_ids), parent_id, name, attributes)
+        stack.append(new_span)
+        return new_span
+
+    def end_span(self, token: Any, error: Optional[BaseException]) -> None:
+        duration = time.perf_counter() - token.start_counter
+        stack = self._get_stack()
+        if len(stack) > 0 and stack[-1] is token:
+            stack.pop()
+
+        line = json.dumps({
+            'span_id': token.span_id,
+            'parent_id': token.parent_id,
+            'thread': threading.get_ident(),
+            'name': token.name,
+            'attributes': token.attributes,
+            'start_time': token.start_time,
+            'duration': duration,
+            'error': repr(error) if error is not None else None,
+        }, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            if self._do_flush:
+                self._file.flush()
+
+    def _get_stack(self) -> List[_JsonLinesSpan]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = list()
+            self._local.stack = stack
+        return stack
@@ -0,0 +1,22 @@
+import zipfile
+from typing import Callable
+
+import pytest
+
+from decks import make_deck_files
+
+
+@pytest.fixture
+def make_deck(tmp_path) -> Callable[[int], str]:
+    """
+    :return: function making a deck file with the number of slides, see make_deck_files(), and returning its path
+    """
+
+    def make(slides_count: int = 3) -> str:
+        path = str(tmp_path / f'deck_{slides_count}.pptx')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name, contents in make_deck_files(slides_count).items():
+                z.writestr(name, contents)
+        return path
+
+    return make
@@ -0,0 +1,94 @@
+from typing import Dict
+
+_NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_NS_CONTENT_TYPES = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_CONTENT_TYPE_PREFIX = 'application/vnd.openxmlformats-officedocument.'
+_RELS_CONTENT_TYPE = 'application/vnd.openxmlformats-package.relationships+xml'
+
+SHAPES_PER_SLIDE = 3
+
+
+def make_shape_xml(shape_id: int) -> str:
+    """
+    Shape with the id has x of id * 100 and a run colored by the tx1 color of the theme.
+    """
+
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Shape {shape_id}"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="{shape_id * 100}" y="10"/><a:ext cx="500" cy="600"/></a:xfrm></p:spPr>'
+            f'<p:txBody><a:bodyPr/><a:p><a:r><a:rPr sz="1800"><a:solidFill><a:schemeClr val="tx1"/></a:solidFill>'
+            f'</a:rPr><a:t>Text {shape_id}</a:t></a:r></a:p></p:txBody></p:sp>')
+
+
+def make_slide_like_xml(tag: str, shapes_count: int) -> str:
+    clr_map = ''
+    if tag == 'sldMaster':
+        clr_map = ('<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" '
+                   'accent3="accent3" accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" '
+                   'folHlink="folHlink"/>')
+    shapes = ''.join(make_shape_xml(shape_id) for shape_id in range(2, 2 + shapes_count))
+    return (f'{_HEADER}<p:{tag} xmlns:a="{_NS_A}" xmlns:r="{_NS_R}" xmlns:p="{_NS_P}"><p:cSld><p:spTree>'
+            f'<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+            f'{shapes}</p:spTree></p:cSld>{clr_map}</p:{tag}>')
+
+
+def make_theme_xml(dk1_color: str = '000000') -> str:
+    return (f'{_HEADER}<a:theme xmlns:a="{_NS_A}" name="Theme"><a:themeElements><a:clrScheme name="Colors">'
+            f'<a:dk1><a:srgbClr val="{dk1_color}"/></a:dk1><a:lt1><a:srgbClr val="FFFFFF"/></a:lt1>'
+            f'<a:dk2><a:srgbClr val="1F497D"/></a:dk2><a:lt2><a:srgbClr val="EEECE1"/></a:lt2>'
+            f'<a:accent1><a:srgbClr val="4F81BD"/></a:accent1></a:clrScheme></a:themeElements></a:theme>')
+
+
+def _make_rels_xml(*relations) -> str:
+    items = ''.join(f'<Relationship Id="rId{i}" Type="{_NS_R}/{rel_type}" Target="{target}"/>'
+                    for i, (rel_type, target) in enumerate(relations, start=1))
+    return f'{_HEADER}<Relationships xmlns="{_NS_RELS}">{items}</Relationships>'
+
+
+def make_deck_files(slides_count: int) -> Dict[str, str]:
+    """
+    Slides with SHAPES_PER_SLIDE shapes each, a layout and a master with a shape each, and a theme.
+    """
+
+    slide_numbers = range(1, slides_count + 1)
+
+    overrides = [('/ppt/presentation.xml', 'presentationml.presentation.main+xml'),
+                 ('/ppt/slideMasters/slideMaster1.xml', 'presentationml.slideMaster+xml'),
+                 ('/ppt/slideLayouts/slideLayout1.xml', 'presentationml.slideLayout+xml'),
+                 ('/ppt/theme/theme1.xml', 'theme+xml')]
+    overrides += [(f'/ppt/slides/slide{i}.xml', 'presentationml.slide+xml') for i in slide_numbers]
+    content_types = (f'{_HEADER}<Types xmlns="{_NS_CONTENT_TYPES}">'
+                     f'<Default Extension="rels" ContentType="{_RELS_CONTENT_TYPE}"/>'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     + ''.join(f'<Override PartName="{part}" ContentType="{_CONTENT_TYPE_PREFIX}{content_type}"/>'
+                               for part, content_type in overrides)
+                     + '</Types>')
+
+    presentation = (f'{_HEADER}<p:presentation xmlns:a="{_NS_A}" xmlns:r="{_NS_R}" xmlns:p="{_NS_P}">'
+                    '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst><p:sldIdLst>'
+                    + ''.join(f'<p:sldId id="{255 + i}" r:id="rId{i + 2}"/>' for i in slide_numbers)
+                    + '</p:sldIdLst><p:sldSz cx="9144000" cy="6858000"/></p:presentation>')
+
+    files = {
+        '[Content_Types].xml': content_types,
+        '_rels/.rels': _make_rels_xml(('officeDocument', 'ppt/presentation.xml')),
+        'ppt/presentation.xml': presentation,
+        'ppt/_rels/presentation.xml.rels': _make_rels_xml(
+            ('slideMaster', 'slideMasters/slideMaster1.xml'), ('theme', 'theme/theme1.xml'),
+            *(('slide', f'slides/slide{i}.xml') for i in slide_numbers)),
+        'ppt/slideMasters/slideMaster1.xml': make_slide_like_xml('sldMaster', 1),
+        'ppt/slideMasters/_rels/slideMaster1.xml.rels': _make_rels_xml(
+            ('slideLayout', '../slideLayouts/slideLayout1.xml'), ('theme', '../theme/theme1.xml')),
+        'ppt/slideLayouts/slideLayout1.xml': make_slide_like_xml('sldLayout', 1),
+        'ppt/slideLayouts/_rels/slideLayout1.xml.rels': _make_rels_xml(
+            ('slideMaster', '../slideMasters/slideMaster1.xml')),
+        'ppt/theme/theme1.xml': make_theme_xml(),
+    }
+    for i in slide_numbers:
+        files[f'ppt/slides/slide{i}.xml'] = make_slide_like_xml('sld', SHAPES_PER_SLIDE)
+        files[f'ppt/slides/_rels/slide{i}.xml.rels'] = _make_rels_xml(
+            ('slideLayout', '../slideLayouts/slideLayout1.xml'))
+    return files
@@ -0,0 +1,68 @@
+from gpptx.load import PresentationContainer
+from gpptx.storage.cache.cache_file import dumps_cache, loads_cache, dump_cache_file, load_cache_file, \
+    load_cache_file_flat, LazyBranch
+
+_CACHE = {
+    '': {
+        'ints': [0, 1, -1, 2 ** 40, -2 ** 40],
+        'floats': [0.5, -1.25],
+        'strs': ['a', '', 'ünicode', 'a'],
+        'mixed': [1, 'a', None, True, 2.5, [1, [2]], {'k': 'v'}],
+        'tuple': (1, 2),
+        'flags': [True, False],
+        'none': None,
+        'big': 10 ** 30,
+        'slides': {str(i): {'x': i * 100, 'name': f'Shape {i}', 'empty': {}} for i in range(20)},
+    },
+}
+
+
+def _to_lists(value):
+    if isinstance(value, dict):
+        return {k: _to_lists(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_lists(it) for it in value]
+    return value
+
+
+def test_dumped_cache_is_loaded_the_same():
+    assert _to_lists(loads_cache(dumps_cache(_CACHE))) == _to_lists(_CACHE)
+
+
+def test_cache_file_is_loaded_the_same(tmp_path):
+    path = str(tmp_path / 'cache')
+    dump_cache_file(_CACHE, path)
+
+    for do_use_mmap in (True, False):
+        assert _to_lists(load_cache_file(path, do_use_mmap=do_use_mmap)) == _to_lists(_CACHE)
+
+
+def test_branches_of_flat_cache_file_are_lazy(tmp_path):
+    path = str(tmp_path / 'cache')
+    dump_cache_file(_CACHE, path)
+
+    values, sons = load_cache_file_flat(path)
+
+    assert sons == {(): {''}}
+    root = values[('',)]
+    assert type(root) is LazyBranch
+    level_values, level_sons = dict(), dict()
+    root.load_level(('',), level_values, level_sons)
+    assert type(level_values[('', 'slides')]) is LazyBranch
+    assert level_values[('', 'big')] == 10 ** 30
+    assert _to_lists(root.load_nested()) == _to_lists(_CACHE[''])
+
+
+def test_container_cache_file_gives_the_same_values(make_deck, tmp_path):
+    path = make_deck(5)
+    container = PresentationContainer.from_path(path)
+    container.presentation.warm_cache()
+    cache_path = str(tmp_path / 'cache')
+    container.dump_cache_file(cache_path)
+
+    loaded = PresentationContainer.from_path(path, do_log_stats=True)
+    loaded.load_cache_file(cache_path)
+
+    assert _to_lists(loaded.dump_cache()) == _to_lists(container.dump_cache())
+    assert [[shape.x for shape in slide.shapes] for slide in loaded.presentation.slides] == [[200, 300, 400]] * 5
+    assert loaded.get_stats_report()['persisting_cache_misses'] == 0
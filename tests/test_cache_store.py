@@ -0,0 +1,114 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gpptx.load import PresentationContainer
+from gpptx.storage.cache.cache_file import dumps_cache, loads_cache
+from gpptx.storage.cache.store import CacheStore
+
+
+def _open_and_store(path: str, store: CacheStore) -> PresentationContainer:
+    container = PresentationContainer.from_path(path, cache_store=store)
+    [shape.x for slide in container.presentation.slides for shape in slide.shapes]
+    container.store_cache()
+    return container
+
+
+@pytest.mark.parametrize('size', [7, 30, 100, -1])
+def test_truncated_cache_raises_value_error(make_deck, size):
+    container = PresentationContainer.from_path(make_deck())
+    [shape.x for slide in container.presentation.slides for shape in slide.shapes]
+    data = dumps_cache(container.dump_cache())
+
+    with pytest.raises(ValueError):
+        loads_cache(data[:size])
+
+
+def test_broken_cache_file_is_removed_from_store(make_deck, tmp_path):
+    path = make_deck()
+    store = CacheStore(str(tmp_path / 'store'))
+    fingerprint = _open_and_store(path, store)._storage.loader.get_fingerprint()
+    cache_path = store.get_cache_file(fingerprint)
+    with open(cache_path, 'r+b') as f:
+        f.truncate(os.path.getsize(cache_path) // 2)
+
+    container = PresentationContainer.from_path(path, cache_store=store)
+
+    assert store.get_cache_file(fingerprint) is None
+    assert [shape.x for shape in container.presentation.slides[0].shapes] == [200, 300, 400]
+
+
+def test_asave_dumps_cache_on_loop_thread(make_deck, tmp_path, monkeypatch):
+    store = CacheStore(str(tmp_path / 'store'))
+    container = PresentationContainer.from_path(make_deck(), cache_store=store)
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+    # noinspection PyProtectedMember
+    storage = container._storage
+    dump_threads = list()
+    dump_persisting_cache = storage.dump_persisting_cache
+
+    def dump_and_note_thread():
+        dump_threads.append(threading.current_thread())
+        return dump_persisting_cache()
+
+    monkeypatch.setattr(storage, 'dump_persisting_cache', dump_and_note_thread)
+    dest = tmp_path / 'saved.pptx'
+    event_loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        with open(str(dest), 'wb') as f:
+            event_loop.run_until_complete(container.asave(f, executor=executor))
+    finally:
+        event_loop.close()
+        executor.shutdown()
+
+    assert dump_threads == [threading.current_thread()]
+    assert not container.is_cache_changed_since_load
+    saved = PresentationContainer.from_path(str(dest), cache_store=store)
+    # noinspection PyProtectedMember
+    assert saved._storage.cacher.has_untracked_persisting_values
+    assert next(iter(saved.presentation.slides[0].shapes)).x == 12345
+
+
+def test_least_recently_used_cache_files_are_evicted(tmp_path):
+    store = CacheStore(str(tmp_path / 'store'))
+    fingerprints = [f'{i:016x}' for i in range(4)]
+    for i, fingerprint in enumerate(fingerprints):
+        store.put_cache(fingerprint, {'': {'values': list(range(100))}})
+        os.utime(store.get_cache_file(fingerprint), ns=(i * 10 ** 9, i * 10 ** 9))
+    cache_file_size = store.get_size() // 4
+
+    store.get_cache_file(fingerprints[0])  # used recently
+    store.evict(cache_file_size * 2)
+
+    assert [store.get_cache_file(it) is not None for it in fingerprints] == [True, False, False, True]
+    assert store.get_size() == cache_file_size * 2
+
+
+def test_put_cache_keeps_store_within_max_size(tmp_path):
+    store = CacheStore(str(tmp_path / 'store'))
+    store.put_cache('0' * 16, {'': {'values': list(range(100))}})
+    cache_file_size = store.get_size()
+    store = CacheStore(store.directory, max_size=cache_file_size * 3)
+
+    for i in range(1, 10):
+        store.put_cache(f'{i:016x}', {'': {'values': list(range(100))}})
+
+    assert store.get_size() <= store.max_size
+
+
+def test_cache_is_found_by_source_contents(make_deck, tmp_path):
+    store = CacheStore(str(tmp_path / 'store'))
+    path = make_deck()
+    _open_and_store(path, store)
+    copy_path = str(tmp_path / 'copy.pptx')
+    with open(path, 'rb') as src, open(copy_path, 'wb') as dest:
+        dest.write(src.read())
+
+    container = PresentationContainer.from_path(copy_path, cache_store=store, do_log_stats=True)
+
+    assert [shape.x for shape in container.presentation.slides[0].shapes] == [200, 300, 400]
+    assert container.get_stats_report()['persisting_cache_misses'] == 0
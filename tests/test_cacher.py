@@ -0,0 +1,85 @@
+import pytest
+
+from gpptx.load import PresentationContainer
+from gpptx.storage.cache.cacher import CacheKey, Cacher, CachePrefixTree
+
+
+def test_cache_keys_are_interned():
+    root = CacheKey('')
+    son = root.make_son('slides').make_son('0')
+
+    assert root.make_son('slides').make_son('0') is son
+    assert son.with_postfix('x') is son.with_postfix('x')
+    assert son.with_postfix('x').with_postfix(None) is son
+    assert son.with_postfix('x').this_or_son_from_postfix is son.make_son('x')
+    assert son == CacheKey('').make_son('slides').make_son('0')
+    assert hash(son) == hash(CacheKey('').make_son('slides').make_son('0'))
+    assert son.with_postfix('x').make_son('y') is son.make_son('y')
+
+
+def test_prefix_tree_duplicate_shares_nothing_changed():
+    root = CacheKey('')
+    tree = CachePrefixTree()
+    tree[root.make_son('a').make_son('b')] = 1
+    tree[root.make_son('c')] = [1, 2]
+
+    duplicate = tree.duplicate()
+    duplicate[root.make_son('a').make_son('d')] = 2
+    del duplicate[root.make_son('c')]
+
+    assert tree.get_inner_tree() == {'': {'a': {'b': 1}, 'c': [1, 2]}}
+    assert duplicate.get_inner_tree() == {'': {'a': {'b': 1, 'd': 2}}}
+    assert duplicate[root.make_son('a').make_son('b')] == (1, True)
+    assert duplicate[root.make_son('c')] == (None, False)
+
+
+def test_persisting_cache_refuses_handles():
+    with pytest.raises(ValueError):
+        Cacher().cache_persist(CacheKey('').make_son('a'), object())
+
+
+def test_least_recently_used_handles_are_evicted_over_budget():
+    cacher = Cacher(local_handles_budget=2)
+    keys = [CacheKey('').make_son(str(i)) for i in range(3)]
+    handles = [object() for _ in keys]
+
+    cacher.cache_local_handles(keys[0], handles[0])
+    cacher.cache_local_handles(keys[1], handles[1])
+    assert cacher.get_from_local_cache(keys[0]) == (handles[0], True)
+    cacher.cache_local_handles(keys[2], handles[2])
+
+    assert cacher.get_from_local_cache(keys[0]) == (handles[0], True)
+    assert cacher.get_from_local_cache(keys[1]) == (None, False)
+    assert cacher.get_from_local_cache(keys[2]) == (handles[2], True)
+
+
+def test_container_within_handles_budget_reads_the_same(make_deck):
+    path = make_deck(10)
+    container = PresentationContainer.from_path(path, local_handles_budget=3)
+
+    xs = [[shape.x for shape in slide.shapes] for slide in container.presentation.slides]
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+
+    assert xs == [[200, 300, 400]] * 10
+    # noinspection PyProtectedMember
+    assert len(container._storage.cacher._local_handles_usage) <= 3
+    assert next(iter(container.presentation.slides[0].shapes)).x == 12345
+
+
+def test_stats_count_hits_and_misses(make_deck):
+    path = make_deck()
+    container = PresentationContainer.from_path(path, do_log_stats=True)
+    [shape.x for shape in container.presentation.slides[0].shapes]
+    report = container.get_stats_report()
+    misses = report['persisting_cache_misses']
+
+    [shape.x for shape in container.presentation.slides[0].shapes]
+
+    assert misses > 0
+    report = container.get_stats_report()
+    assert report['persisting_cache_misses'] == misses
+    assert report['persisting_cache_hits'] > 0
+    x_stats = report['properties']['Shape.x']
+    assert x_stats['misses'] == 3 and x_stats['hits'] == 3
+    assert sum(x_stats['compute_time_histogram']) == x_stats['misses']
+    assert len(x_stats['compute_time_histogram']) == len(report['compute_time_buckets']) + 1
@@ -0,0 +1,43 @@
+import zipfile
+from io import BytesIO
+
+from gpptx.load import PresentationContainer
+from gpptx.storage.pptx.compression import CompressionPolicy, Compression
+
+
+def test_longest_prefix_is_chosen():
+    policy = CompressionPolicy(compression_by_prefix={
+        'ppt/': Compression.FAST_DEFLATE,
+        'ppt/media/': Compression.STORE,
+        'ppt/media/big/': Compression.MAX_DEFLATE,
+    })
+
+    assert policy.choose('ppt/media/big/image1.png') == Compression.MAX_DEFLATE
+    assert policy.choose('ppt/media/image1.png') == Compression.STORE
+    assert policy.choose('ppt/slides/slide1.xml') == Compression.FAST_DEFLATE
+    assert policy.choose('docProps/app.xml') == Compression.DEFLATE
+
+
+def test_prefix_is_chosen_before_extension():
+    policy = CompressionPolicy(compression_by_extension={'PNG': Compression.STORE},
+                               compression_by_prefix={'ppt/media/': Compression.MAX_DEFLATE})
+
+    assert policy.choose('ppt/media/image1.png') == Compression.MAX_DEFLATE
+    assert policy.choose('ppt/embeddings/image1.png') == Compression.STORE
+
+
+def test_saved_members_are_compressed_by_policy(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    policy = CompressionPolicy(compression_by_prefix={'ppt/slides/': Compression.STORE,
+                                                      'ppt/slides/_rels/': Compression.FAST_DEFLATE})
+    dest = BytesIO()
+
+    container.save(dest, do_copy_unchanged_raw=False, compression_policy=policy)
+
+    with zipfile.ZipFile(dest) as z:
+        assert z.testzip() is None
+        for info in z.infolist():
+            if info.filename.startswith('ppt/slides/') and not info.filename.startswith('ppt/slides/_rels/'):
+                assert info.compress_type == zipfile.ZIP_STORED
+            else:
+                assert info.compress_type == zipfile.ZIP_DEFLATED
@@ -0,0 +1,93 @@
+from gpptx.load import PresentationContainer
+from gpptx.storage.cache.cacher import CacheKey
+
+from decks import make_slide_like_xml, make_theme_xml
+
+_SLIDE_PATH = 'ppt/slides/slide3.xml'
+_THEME_PATH = 'ppt/theme/theme1.xml'
+
+
+def _get_first_run(container: PresentationContainer):
+    shape = next(iter(container.presentation.slides[0].shapes))
+    run = shape.text_frame.paragraphs[0].runs[0]
+    run.do_use_defaults_when_null = True
+    return run
+
+
+def _replace_slide_xml(container: PresentationContainer, shapes_count: int) -> None:
+    contents = make_slide_like_xml('sld', shapes_count).replace('x="200"', 'x="7"')
+    # noinspection PyProtectedMember
+    container._storage.loader.save_file_str(_SLIDE_PATH, contents)
+
+
+def test_replaced_part_invalidates_shape_values(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    assert [shape.x for shape in container.presentation.slides[2].shapes] == [200, 300, 400]
+
+    _replace_slide_xml(container, 3)
+
+    assert [shape.x for shape in container.presentation.slides[2].shapes] == [7, 300, 400]
+
+
+def test_replaced_part_invalidates_flatten(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    assert [shape.x for shape in container.presentation.slides[2].shapes.flatten()] == [200, 300, 400]
+
+    _replace_slide_xml(container, 4)
+
+    assert [shape.x for shape in container.presentation.slides[2].shapes.flatten()] == [7, 300, 400, 500]
+
+
+def test_replaced_part_invalidates_values_from_loaded_cache(make_deck):
+    path = make_deck()
+    container = PresentationContainer.from_path(path)
+    assert _get_first_run(container).color_rgb == '000000'
+    cache = container.dump_cache()
+
+    container = PresentationContainer.from_path(path, cache=cache)
+    theme = container.presentation.slides[0].theme
+    assert theme.color_rgbs['dk1'] == '000000'
+    assert _get_first_run(container).color_rgb == '000000'
+    # noinspection PyProtectedMember
+    container._storage.loader.save_file_str(_THEME_PATH, make_theme_xml('FF0000'))
+
+    assert theme.color_rgbs['dk1'] == 'FF0000'
+    assert _get_first_run(container).color_rgb == 'FF0000'
+
+
+def test_unrelated_part_change_keeps_values_from_loaded_cache(make_deck):
+    path = make_deck()
+    container = PresentationContainer.from_path(path)
+    [shape.x for slide in container.presentation.slides for shape in slide.shapes]
+    cache = container.dump_cache()
+
+    container = PresentationContainer.from_path(path, cache=cache)
+    # noinspection PyProtectedMember
+    storage = container._storage
+    storage.loader.save_file('ppt/media/image1.png', b'image')
+    _replace_slide_xml(container, 3)
+
+    slides_key = CacheKey('').make_son('slides')
+    assert storage.cacher.have_in_persisting_cache(slides_key.make_son('0'))
+    assert not storage.cacher.have_in_persisting_cache(slides_key.make_son('2'))
+    assert [shape.x for shape in container.presentation.slides[2].shapes] == [7, 300, 400]
+
+
+def test_deleted_slides_keep_values_from_loaded_cache_of_others(make_deck):
+    path = make_deck(5)
+    container = PresentationContainer.from_path(path)
+    [shape.x for slide in container.presentation.slides for shape in slide.shapes]
+    cache = container.dump_cache()
+
+    container = PresentationContainer.from_path(path, cache=cache)
+    slides = container.presentation.slides
+    slides.delete(1)
+    # noinspection PyProtectedMember
+    container._storage.loader.save_file_str('ppt/slides/slide4.xml', make_slide_like_xml('sld', 1))
+
+    slides_key = CacheKey('').make_son('slides')
+    # noinspection PyProtectedMember
+    cacher = container._storage.cacher
+    assert [cacher.have_in_persisting_cache(slides_key.make_son(str(i))) for i in range(4)] == \
+        [True, True, False, True]
+    assert [len(list(slide.shapes)) for slide in slides] == [3, 3, 1, 3]
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from gpptx.load import PresentationContainer
+from gpptx.storage.pptx.loader import Loader
+from decks import make_slide_like_xml
+
+
+def test_compact_keeps_file_mode(make_deck):
+    path = make_deck()
+    os.chmod(path, 0o644)
+    container = PresentationContainer.from_path(path)
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+
+    container.compact()
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert next(iter(PresentationContainer.from_path(path).presentation.slides[0].shapes)).x == 12345
+
+
+def test_concurrent_reads_of_part_share_tree(make_deck):
+    filepath = 'ppt/slides/slide1.xml'
+    contents = make_slide_like_xml('sld', 2000)
+    loader = Loader(xml_cache_budget=10 ** 9)
+    loader.load_path(make_deck())
+    executor = ThreadPoolExecutor(max_workers=8)
+    event_loop = asyncio.new_event_loop()
+    try:
+        for _ in range(10):
+            loader.save_file_str(filepath, contents)
+
+            async def read_concurrently():
+                return await asyncio.gather(*(loader.aget_file_xml(filepath, executor) for _ in range(8)))
+
+            trees = event_loop.run_until_complete(read_concurrently())
+
+            assert all(tree is loader.get_file_xml(filepath) for tree in trees)
+            # noinspection PyProtectedMember
+            assert loader._xml_cache_size == len(contents)
+    finally:
+        event_loop.close()
+        executor.shutdown()
+
+
+def test_save_in_place_closes_replaced_source(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    shape = next(iter(container.presentation.slides[0].shapes))
+    # noinspection PyProtectedMember
+    sources = [container._storage.loader._zip.fp]
+
+    for x in range(1, 11):
+        shape.x = x
+        container.save_in_place()
+        # noinspection PyProtectedMember
+        sources.append(container._storage.loader._zip.fp)
+    container.compact()
+
+    assert all(src.closed for src in sources)
+    assert next(iter(container.presentation.slides[0].shapes)).x == 10
+
+
+def test_save_in_place_keeps_source_of_duplicate_open(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    duplicate = container.duplicate()
+    next(iter(container.presentation.slides[0].shapes)).x = 1
+
+    # noinspection PyProtectedMember
+    src = container._storage.loader._zip.fp
+
+    container.save_in_place()
+
+    assert not src.closed
+    assert [shape.x for shape in duplicate.presentation.slides[1].shapes] == [200, 300, 400]
@@ -0,0 +1,36 @@
+import io
+import zipfile
+
+import pytest
+
+from gpptx.storage.pptx.mapped_file import MappedFile
+
+
+def test_reads_and_seeks_like_file(tmp_path):
+    path = str(tmp_path / 'data.bin')
+    data = bytes(range(256)) * 4
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    with MappedFile(path) as f:
+        assert f.read(10) == data[:10]
+        assert f.seek(-6, io.SEEK_END) == len(data) - 6
+        assert f.read() == data[-6:]
+        assert f.read(1) == b''
+        f.seek(100)
+        f.seek(5, io.SEEK_CUR)
+        buffer = bytearray(8)
+        assert f.readinto(buffer) == 8
+        assert bytes(buffer) == data[105:113]
+        with pytest.raises(ValueError):
+            f.seek(-1)
+    assert f.closed
+
+
+def test_zip_reads_mapped_file(make_deck):
+    path = make_deck()
+
+    with zipfile.ZipFile(path) as z, zipfile.ZipFile(MappedFile(path)) as mapped_z:
+        assert mapped_z.testzip() is None
+        assert {name: mapped_z.read(name) for name in mapped_z.namelist()} == \
+               {name: z.read(name) for name in z.namelist()}
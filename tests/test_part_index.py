@@ -0,0 +1,43 @@
+from gpptx.storage.pptx.part_index import PartIndex
+
+_PATHS = ['ppt/slides/slide1.xml', 'ppt/slides/slide10.xml', 'ppt/slides/slide2.xml',
+          'ppt/slides/_rels/slide1.xml.rels', 'ppt/media/image3.png', 'ppt/media/image3.jpeg']
+
+
+def test_finds_paths_by_dir_and_content():
+    index = PartIndex(_PATHS)
+
+    assert sorted(index.get_dir_paths('ppt/slides/')) == sorted(_PATHS[:3])
+    assert sorted(index.get_dir_paths('ppt/', do_include_subdirs=True)) == sorted(_PATHS)
+    assert index.get_content_paths('ppt/slides/', 'slide') == ['ppt/slides/slide1.xml', 'ppt/slides/slide2.xml',
+                                                               'ppt/slides/slide10.xml']
+    assert index.get_content_paths('ppt/media/', 'image') == ['ppt/media/image3.jpeg', 'ppt/media/image3.png']
+    assert index.get_last_index('ppt/slides/', 'slide') == 10
+    assert index.get_last_index('ppt/charts/', 'chart') == 0
+    assert index.rels_paths == {'ppt/slides/_rels/slide1.xml.rels'}
+
+
+def test_last_index_follows_removals():
+    index = PartIndex(_PATHS)
+
+    index.remove('ppt/slides/slide10.xml')
+    assert index.get_last_index('ppt/slides/', 'slide') == 2
+    index.add('ppt/slides/slide7.xml')
+    assert index.get_last_index('ppt/slides/', 'slide') == 7
+    index.remove('ppt/media/image3.png')
+    assert index.get_last_index('ppt/media/', 'image') == 3
+    index.remove('ppt/media/image3.jpeg')
+    assert index.get_dir_paths('ppt/media/') == []
+    assert index.get_last_index('ppt/media/', 'image') == 0
+
+
+def test_duplicate_is_independent():
+    index = PartIndex(_PATHS)
+    duplicate = index.duplicate()
+
+    duplicate.remove('ppt/slides/slide1.xml')
+    duplicate.add('ppt/slides/slide11.xml')
+
+    assert index.has('ppt/slides/slide1.xml') and not index.has('ppt/slides/slide11.xml')
+    assert index.get_last_index('ppt/slides/', 'slide') == 10
+    assert duplicate.get_last_index('ppt/slides/', 'slide') == 11
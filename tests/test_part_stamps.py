@@ -0,0 +1,25 @@
+from gpptx.load import PresentationContainer
+
+
+def test_dump_cache_serializes_changed_shared_part_once(make_deck):
+    container = PresentationContainer.from_path(make_deck(30))
+    presentation = container.presentation
+    for slide in presentation.slides:
+        [shape.x for shape in slide.shapes]
+    slide_master = presentation.slides[0].slide_layout.slide_master
+    next(iter(slide_master.shapes)).x = 12345
+
+    # noinspection PyProtectedMember
+    loader = container._storage.loader
+    stringify_xml = loader._stringify_xml
+    serialized_trees = list()
+
+    def stringify_xml_counting(tree):
+        serialized_trees.append(tree)
+        return stringify_xml(tree)
+
+    loader._stringify_xml = stringify_xml_counting
+    container.dump_cache()
+
+    assert len(serialized_trees) == 1
+
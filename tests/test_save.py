@@ -0,0 +1,107 @@
+import os
+import zipfile
+import zlib
+from io import BytesIO
+
+import pytest
+
+from gpptx.load import PresentationContainer
+
+
+def _read_members(zip_file: zipfile.ZipFile):
+    return {info.filename: zip_file.read(info) for info in zip_file.infolist()}
+
+
+def _assert_crcs_match(zip_file: zipfile.ZipFile) -> None:
+    assert zip_file.testzip() is None
+    for info in zip_file.infolist():
+        assert info.CRC == zlib.crc32(zip_file.read(info))
+
+
+def _get_xs(container: PresentationContainer):
+    return [[shape.x for shape in slide.shapes] for slide in container.presentation.slides]
+
+
+@pytest.mark.parametrize('do_copy_unchanged_raw', [True, False])
+def test_save_round_trip(make_deck, do_copy_unchanged_raw):
+    path = make_deck()
+    container = PresentationContainer.from_path(path)
+    next(iter(container.presentation.slides[1].shapes)).x = 12345
+    dest = BytesIO()
+
+    container.save(dest, do_copy_unchanged_raw=do_copy_unchanged_raw)
+
+    with zipfile.ZipFile(dest) as saved, zipfile.ZipFile(path) as src:
+        _assert_crcs_match(saved)
+        saved_members = _read_members(saved)
+        src_members = _read_members(src)
+    assert set(saved_members) == set(src_members)
+    assert [name for name in src_members if saved_members[name] != src_members[name]] == ['ppt/slides/slide2.xml']
+    assert _get_xs(PresentationContainer(BytesIO(dest.getvalue()))) == [[200, 300, 400], [12345, 300, 400],
+                                                                        [200, 300, 400]]
+
+
+def test_saves_with_and_without_raw_copy_have_same_fingerprint(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+    dests = [BytesIO(), BytesIO()]
+
+    container.save(dests[0], do_copy_unchanged_raw=True)
+    container.save(dests[1], do_copy_unchanged_raw=False, workers=4)
+
+    # noinspection PyProtectedMember
+    fingerprints = [PresentationContainer(dest)._storage.loader.get_fingerprint() for dest in dests]
+    assert fingerprints[0] == fingerprints[1]
+    # noinspection PyProtectedMember
+    assert fingerprints[0] != PresentationContainer.from_path(make_deck())._storage.loader.get_fingerprint()
+
+
+def test_parallel_save_matches_sequential_one(make_deck):
+    container = PresentationContainer.from_path(make_deck(20))
+    for slide in container.presentation.slides:
+        next(iter(slide.shapes)).x = 12345
+    dests = [BytesIO(), BytesIO()]
+
+    container.save(dests[0], do_copy_unchanged_raw=False, workers=1)
+    container.save(dests[1], do_copy_unchanged_raw=False, workers=8)
+
+    with zipfile.ZipFile(dests[0]) as sequential, zipfile.ZipFile(dests[1]) as parallel:
+        _assert_crcs_match(parallel)
+        assert _read_members(sequential) == _read_members(parallel)
+
+
+def test_iter_save_output_opens_as_zip(make_deck):
+    container = PresentationContainer.from_path(make_deck())
+    next(iter(container.presentation.slides[2].shapes)).x = 12345
+    dest = BytesIO()
+    container.save(dest)
+
+    chunks = list(container.iter_save(chunk_size=1000))
+
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    data = b''.join(chunks)
+    with zipfile.ZipFile(BytesIO(data)) as streamed, zipfile.ZipFile(dest) as saved:
+        _assert_crcs_match(streamed)
+        assert _read_members(streamed) == _read_members(saved)
+    assert _get_xs(PresentationContainer(BytesIO(data)))[2] == [12345, 300, 400]
+
+
+def test_repeated_save_in_place_and_compact(make_deck):
+    path = make_deck()
+    container = PresentationContainer.from_path(path)
+    shape = next(iter(container.presentation.slides[0].shapes))
+
+    for x in range(1, 6):
+        shape.x = x
+        container.save_in_place()
+        assert _get_xs(PresentationContainer.from_path(path))[0] == [x, 300, 400]
+    size_with_dead_space = os.path.getsize(path)
+    container.compact()
+
+    assert os.path.getsize(path) < size_with_dead_space
+    with zipfile.ZipFile(path) as z:
+        _assert_crcs_match(z)
+        assert len(z.namelist()) == len(set(z.namelist()))
+    # noinspection PyProtectedMember
+    assert not container._storage.loader.has_changes()
+    assert _get_xs(PresentationContainer.from_path(path)) == [[5, 300, 400], [200, 300, 400], [200, 300, 400]]
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from gpptx.load import PresentationContainer
+
+
+def _get_xs(container: PresentationContainer):
+    return [[shape.x for shape in slide.shapes] for slide in container.presentation.slides]
+
+
+@pytest.mark.parametrize('do_embed_source', [True, False])
+def test_snapshot_round_trip(make_deck, tmp_path, do_embed_source):
+    container = PresentationContainer.from_path(make_deck(), do_log_stats=True)
+    container.presentation.warm_cache()
+    next(iter(container.presentation.slides[1].shapes)).x = 12345
+    container.presentation.slides.delete(2)
+    snapshot_path = str(tmp_path / 'snapshot')
+
+    container.snapshot(snapshot_path, do_embed_source=do_embed_source)
+    restored = PresentationContainer.from_snapshot(snapshot_path)
+
+    assert restored.dump_cache() == container.dump_cache()
+    assert _get_xs(restored) == [[200, 300, 400], [12345, 300, 400]]
+    # noinspection PyProtectedMember
+    assert restored._storage.loader.has_changes()
+
+
+def test_snapshot_of_changed_source_is_refused(make_deck, tmp_path):
+    path = make_deck()
+    container = PresentationContainer.from_path(path)
+    snapshot_path = str(tmp_path / 'snapshot')
+    container.snapshot(snapshot_path)
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+    container.save_in_place()
+    os.utime(path, ns=(0, 0))
+
+    with pytest.raises(ValueError):
+        PresentationContainer.from_snapshot(snapshot_path)
+
+
+def test_not_snapshot_is_refused(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+
+    with pytest.raises(ValueError):
+        PresentationContainer.from_snapshot(path)
@@ -0,0 +1,72 @@
+from io import BytesIO
+
+import pytest
+
+from gpptx.load import TemplateBase, PresentationContainer
+
+
+def _get_xs(container: PresentationContainer):
+    return [[shape.x for shape in slide.shapes] for slide in container.presentation.slides]
+
+
+def _reload(container: PresentationContainer) -> PresentationContainer:
+    dest = BytesIO()
+    container.save(dest)
+    return PresentationContainer(BytesIO(dest.getvalue()))
+
+
+def test_containers_opened_from_template_are_isolated(make_deck):
+    template = TemplateBase(make_deck())
+    first = template.open()
+    second = template.open()
+    [shape.x for shape in second.presentation.slides[0].shapes]
+
+    next(iter(first.presentation.slides[0].shapes)).x = 12345
+    first.presentation.slides.delete(2)
+
+    assert _get_xs(first) == [[12345, 300, 400], [200, 300, 400]]
+    assert _get_xs(second) == [[200, 300, 400]] * 3
+    assert _get_xs(template.open()) == [[200, 300, 400]] * 3
+    assert _get_xs(_reload(first)) == [[12345, 300, 400], [200, 300, 400]]
+    assert _get_xs(_reload(second)) == [[200, 300, 400]] * 3
+
+
+def test_container_opened_from_template_cant_be_saved_in_place(make_deck):
+    container = TemplateBase(make_deck()).open()
+    next(iter(container.presentation.slides[0].shapes)).x = 12345
+
+    with pytest.raises(ValueError):
+        container.save_in_place()
+
+
+def test_warmed_cache_is_shared_by_next_containers(make_deck):
+    template = TemplateBase(make_deck())
+    template.warm_cache(lambda presentation: presentation.warm_cache())
+
+    container = template.open(do_log_stats=True)
+
+    assert _get_xs(container) == [[200, 300, 400]] * 3
+    assert container.get_stats_report()['persisting_cache_misses'] == 0
+    assert template.dump_cache() == container.dump_cache()
+
+
+def test_warmer_must_not_change_presentation(make_deck):
+    template = TemplateBase(make_deck())
+
+    def change(presentation):
+        next(iter(presentation.slides[0].shapes)).x = 12345
+
+    with pytest.raises(ValueError):
+        template.warm_cache(change)
+    assert _get_xs(template.open()) == [[200, 300, 400]] * 3
+
+
+def test_template_cache_is_loaded_by_containers(make_deck):
+    path = make_deck()
+    warmed = PresentationContainer.from_path(path)
+    warmed.presentation.warm_cache()
+
+    container = TemplateBase(path, cache=warmed.dump_cache()).open(do_log_stats=True)
+
+    assert _get_xs(container) == [[200, 300, 400]] * 3
+    assert container.get_stats_report()['persisting_cache_misses'] == 0
@@ -0,0 +1,36 @@
+import io
+import json
+
+import pytest
+
+from gpptx.load import PresentationContainer
+from gpptx.util import tracing
+
+
+class _IncompleteTracer(tracing.Tracer):
+    def start_span(self, name, attributes):
+        return None
+
+
+def test_incomplete_tracer_can_not_be_made():
+    with pytest.raises(TypeError):
+        _IncompleteTracer()
+
+
+def test_json_lines_tracer_writes_nested_spans(make_deck):
+    file = io.StringIO()
+    tracing.set_tracer(tracing.JsonLinesTracer(file))
+    try:
+        container = PresentationContainer.from_path(make_deck())
+        [shape.x for shape in container.presentation.slides[0].shapes]
+        container.save(io.BytesIO())
+    finally:
+        tracing.set_tracer(None)
+
+    spans = [json.loads(line) for line in file.getvalue().splitlines()]
+    spans_by_id = {span['span_id']: span for span in spans}
+    names = {span['name'] for span in spans}
+    assert {'loader.get_file_xml', 'cache.compute', 'loader.save'} <= names
+    assert all(span['parent_id'] is None or span['parent_id'] in spans_by_id for span in spans)
+    assert any(spans_by_id[span['parent_id']]['name'] == 'cache.compute'
+               for span in spans if span['name'] == 'cache.compute' and span['parent_id'] is not None)
@@ -0,0 +1,38 @@
+from gpptx.load import PresentationContainer
+
+
+def _get_xs(container: PresentationContainer):
+    return [[shape.x for shape in slide.shapes] for slide in container.presentation.slides]
+
+
+def test_warmed_values_are_read_from_cache(make_deck):
+    container = PresentationContainer.from_path(make_deck(), do_log_stats=True)
+    container.presentation.warm_cache()
+    misses = container.get_stats_report()['persisting_cache_misses']
+
+    assert _get_xs(container) == [[200, 300, 400]] * 3
+    assert container.get_stats_report()['persisting_cache_misses'] == misses
+
+
+def test_warming_in_processes_gives_the_same_cache(make_deck):
+    path = make_deck(6)
+    container = PresentationContainer.from_path(path)
+    container.presentation.warm_cache()
+    warmed_in_processes = PresentationContainer.from_path(path, do_log_stats=True)
+
+    warmed_in_processes.presentation.warm_cache(workers=2)
+
+    assert warmed_in_processes.dump_cache() == container.dump_cache()
+    assert _get_xs(warmed_in_processes) == [[200, 300, 400]] * 6
+    assert warmed_in_processes.get_stats_report()['properties']['Shape.x']['misses'] == 0
+
+
+def test_warming_chosen_properties_only(make_deck):
+    container = PresentationContainer.from_path(make_deck(), do_log_stats=True)
+
+    container.presentation.warm_cache(properties=['x'])
+
+    slides_cache = container.dump_cache()['']['slides']
+    assert all('x' in str(branch) for branch in slides_cache.values())
+    assert _get_xs(container) == [[200, 300, 400]] * 3
+    assert container.get_stats_report()['properties']['Shape.x']['hits'] == 9
@@ -0,0 +1,78 @@
+import gc
+import weakref
+from io import BytesIO
+
+from gpptx.load import PresentationContainer, TemplateBase
+
+
+def _reload(container: PresentationContainer) -> PresentationContainer:
+    dest = BytesIO()
+    container.save(dest)
+    return PresentationContainer(BytesIO(dest.getvalue()))
+
+
+def _get_first_shape(slide):
+    return next(iter(slide.shapes))
+
+
+def _get_first_slide_shapes(container: PresentationContainer):
+    return list(container.presentation.slides[0].shapes)
+
+
+def test_changes_of_live_shape_are_kept_after_other_parts_are_read(make_deck):
+    container = PresentationContainer.from_path(make_deck(), xml_cache_budget=1)
+    slides = container.presentation.slides
+    shape = _get_first_shape(slides[0])
+    for other_shape in slides[1].shapes:
+        other_shape.x
+
+    shape.x = 12345
+
+    assert _get_first_shape(_reload(container).presentation.slides[0]).x == 12345
+
+
+def test_parts_without_live_nodes_are_evicted(make_deck):
+    container = PresentationContainer.from_path(make_deck(5), xml_cache_budget=1)
+    # noinspection PyProtectedMember
+    loader = container._storage.loader
+    for slide in container.presentation.slides:
+        [shape.x for shape in slide.shapes]
+    del slide
+    gc.collect()
+    _get_first_shape(container.presentation.slides[0]).x = 12345
+
+    # noinspection PyProtectedMember
+    cached_slide_paths = [path for path in loader._xml_cache if path.startswith('ppt/slides/slide')]
+    assert len(cached_slide_paths) <= 1
+    assert [shape.x for shape in _reload(container).presentation.slides[0].shapes] == [12345, 300, 400]
+
+
+def test_overlay_keeps_copies_of_template_parts_within_budget(make_deck):
+    template = TemplateBase(make_deck(5))
+    container = template.open(xml_cache_budget=1)
+    # noinspection PyProtectedMember
+    loader = container._storage.loader
+    for slide in container.presentation.slides:
+        [shape.x for shape in slide.shapes]
+    del slide
+    gc.collect()
+
+    # noinspection PyProtectedMember
+    cached_slide_paths = [path for path in loader._xml_cache if path.startswith('ppt/slides/slide')]
+    assert len(cached_slide_paths) <= 1
+    assert [shape.x for shape in _get_first_slide_shapes(container)] == [200, 300, 400]
+
+
+def test_container_is_freed_without_cyclic_gc(make_deck):
+    path = make_deck()
+    gc.disable()
+    try:
+        for budget in (None, 1):
+            container = PresentationContainer.from_path(path, xml_cache_budget=budget)
+            [shape.x for shape in _get_first_slide_shapes(container)]
+            # noinspection PyProtectedMember
+            storage_ref = weakref.ref(container._storage)
+            del container
+            assert storage_ref() is None
+    finally:
+        gc.enable()
@@ -0,0 +1,65 @@
+import zipfile
+from io import BytesIO
+
+from gpptx.storage.pptx.zip_tools import iter_copy_raw_member, ChunkBuffer, make_zip_fingerprint, compress_member, \
+    write_compressed_member
+
+
+def _make_zip(members, compression: int = zipfile.ZIP_DEFLATED) -> BytesIO:
+    dest = BytesIO()
+    with zipfile.ZipFile(dest, 'w', compression) as z:
+        for name, contents in members.items():
+            z.writestr(name, contents)
+    return dest
+
+
+def test_raw_member_copy_keeps_compressed_bytes():
+    members = {'a.xml': b'<a>' + b'x' * 100000 + b'</a>', 'b.bin': bytes(range(256)) * 10}
+    with zipfile.ZipFile(_make_zip(members)) as src:
+        dest = BytesIO()
+        with zipfile.ZipFile(dest, 'w') as dest_zip:
+            for info in src.infolist():
+                list(iter_copy_raw_member(src, info, dest_zip))
+        src_infos = {info.filename: (info.CRC, info.compress_size, info.compress_type) for info in src.infolist()}
+
+    with zipfile.ZipFile(dest) as copied:
+        assert copied.testzip() is None
+        assert {name: copied.read(name) for name in copied.namelist()} == members
+        assert {info.filename: (info.CRC, info.compress_size, info.compress_type)
+                for info in copied.infolist()} == src_infos
+
+
+def test_compressed_member_is_read_by_zipfile():
+    contents = b'<a>' + b'y' * 10000 + b'</a>'
+    dest = BytesIO()
+    with zipfile.ZipFile(dest, 'w') as z:
+        write_compressed_member(z, 'deflated.xml', compress_member(contents))
+        write_compressed_member(z, 'stored.xml', compress_member(contents, compress_type=zipfile.ZIP_STORED))
+
+    with zipfile.ZipFile(dest) as z:
+        assert z.testzip() is None
+        assert z.read('deflated.xml') == z.read('stored.xml') == contents
+        assert z.getinfo('deflated.xml').compress_size < z.getinfo('stored.xml').compress_size
+
+
+def test_chunk_buffer_pops_whole_chunks_then_rest():
+    buffer = ChunkBuffer()
+    buffer.write(b'abc')
+    assert list(buffer.pop_chunks(4)) == []
+
+    buffer.write(b'defghij')
+    assert list(buffer.pop_chunks(4)) == [b'abcd', b'efgh']
+    buffer.write(b'k')
+    assert list(buffer.pop_chunks(4, do_pop_rest=True)) == [b'ijk']
+    assert list(buffer.pop_chunks(4, do_pop_rest=True)) == []
+
+
+def test_fingerprint_depends_on_contents_only():
+    members = {'a.xml': b'<a/>', 'b.xml': b'<b/>'}
+    reordered = {'b.xml': b'<b/>', 'a.xml': b'<a/>'}
+
+    with zipfile.ZipFile(_make_zip(members)) as a, \
+            zipfile.ZipFile(_make_zip(reordered, zipfile.ZIP_STORED)) as b, \
+            zipfile.ZipFile(_make_zip({'a.xml': b'<a/>', 'b.xml': b'<c/>'})) as c:
+        assert make_zip_fingerprint(a.infolist()) == make_zip_fingerprint(b.infolist())
+        assert make_zip_fingerprint(a.infolist()) != make_zip_fingerprint(c.infolist())